@@ -17,46 +17,1884 @@ v0.1.1
 # https://forum.blackmagicdesign.com/viewtopic.php?f=21&t=113252
 """
 
-import os, tempfile, errno, re, unicodedata, sys
-import tkinter as tk
+import os, errno, re, unicodedata, sys, time, functools, bisect, heapq, csv, json, threading, hashlib, atexit
+from array import array
+from math import gcd
+
+# Imported on first use by GetNumPy()
+numpy = None
+
+# Marking modes that can be requested by name when running headless
+MARKING_MODES = {
+    'dual'      : 'MarkClipsUsingDualMarkers',
+    'duration'  : 'MarkClipsUsingMarkerDuration',
+}
+
+class Logger:
+    """
+    Leveled, buffered log for everything MarkerMan reports. Records below level are
+    dropped straight away, the rest are buffered and written to the console in one go
+    (Resolve's console is slow to write to line by line), and as JSON lines to path
+    if one is set. The buffer is written once it holds maxRecords records or interval
+    seconds have passed since the last write, on warnings and errors, and on Flush().
+    Summaries are logged at INFO, per clip / per job detail at DEBUG.
+    """
+    levels = { 'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40 }
+
+    def __init__( self, level='INFO', path=None, maxRecords=500, interval=1.0 ):
+        self.lock = threading.Lock()
+        self.records = []
+        self.flushed = time.monotonic()
+        self.Configure( level, path, maxRecords, interval )
+
+    def Configure( self, level='INFO', path=None, maxRecords=500, interval=1.0 ):
+        if level.upper() not in self.levels:
+            raise ValueError( f"Unknown log level '{level}', expected one of: {', '.join( self.levels )}" )
+        self.Flush()
+        self.level = self.levels[ level.upper() ]
+        self.path = path
+        self.maxRecords = maxRecords
+        self.interval = interval
+        return self
+
+    def Enabled( self, level ):
+        return self.levels[ level ] >= self.level
+
+    def Log( self, level, message, fields ):
+        number = self.levels[ level ]
+        if number < self.level:
+            return
+        with self.lock:
+            self.records.append( ( time.time(), level, message, fields ) )
+            due = len( self.records ) >= self.maxRecords or number >= self.levels['WARNING'] or time.monotonic() - self.flushed >= self.interval
+        if due:
+            self.Flush()
+
+    def Debug( self, message, **fields ):
+        self.Log( 'DEBUG', message, fields )
+
+    def Info( self, message, **fields ):
+        self.Log( 'INFO', message, fields )
+
+    def Warning( self, message, **fields ):
+        self.Log( 'WARNING', message, fields )
+
+    def Error( self, message, **fields ):
+        self.Log( 'ERROR', message, fields )
+
+    def Flush( self ):
+        with self.lock:
+            records = self.records
+            self.records = []
+            self.flushed = time.monotonic()
+        if not records:
+            return self
+
+        lines = []
+        for stamp, level, message, fields in records:
+            if fields:
+                message = f"{message} {' '.join( f'{key}={value}' for key, value in fields.items() )}"
+            lines.append( message if level == 'INFO' else f"{level}: {message}" )
+        sys.stdout.write( '\n'.join( lines ) + '\n' )
+        sys.stdout.flush()
+
+        if self.path:
+            try:
+                with open( self.path, 'a', encoding='utf-8' ) as file:
+                    file.write( ''.join( json.dumps( dict( fields, time=stamp, level=level, message=message ), default=str ) + '\n' for stamp, level, message, fields in records ) )
+            except OSError as e:
+                sys.stdout.write( f"ERROR: Unable to write the log to {self.path}: {e}\n" )
+        return self
+
+# Everything is logged through here, see Logger
+log = Logger()
+atexit.register( log.Flush )
+
+class Preferences:
+    """
+    Small JSON file of things worth remembering between launches: the last used marker
+    colours and marking mode, and the screen size used to centre dialogs.
+    """
+    def __init__( self, path=None ):
+        self.path = path or os.path.join( GetCacheDirectory(), 'preferences.json' )
+        self.values = None
+
+    def Load( self ):
+        try:
+            with open( self.path, encoding='utf-8' ) as file:
+                self.values = json.load( file )
+        except ( OSError, ValueError ):
+            self.values = {}
+        return self
+
+    def Get( self, key, default=None ):
+        if self.values is None:
+            self.Load()
+        return self.values.get( key, default )
+
+    def Set( self, key, value ):
+        if self.values is None:
+            self.Load()
+        self.values[ key ] = value
+        return self
+
+    def Save( self ):
+        try:
+            os.makedirs( os.path.dirname( self.path ), exist_ok=True )
+            with open( self.path, 'w', encoding='utf-8' ) as file:
+                json.dump( self.values, file )
+        except OSError as e:
+            log.Warning( f"Unable to save preferences to {self.path}: {e}" )
+        return self
+
+class FileCache:
+    """
+    Directory of JSON files kept between runs, one per key, such as the marker snapshots
+    MarkClipsIncrementally compares against. Once the files grow past maxBytes the
+    least recently used are deleted.
+    """
+    def __init__( self, directory, maxBytes=32 * 1024 * 1024 ):
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+    def Path( self, key ):
+        return os.path.join( self.directory, f"{key}.json" )
+
+    def Load( self, key ):
+        path = self.Path( key )
+        try:
+            with open( path, encoding='utf-8' ) as file:
+                entry = json.load( file )
+            # Touched on every hit, eviction goes by modification time
+            os.utime( path )
+        except ( OSError, ValueError ):
+            return None
+        return entry
+
+    def Save( self, key, entry ):
+        path = self.Path( key )
+        try:
+            os.makedirs( self.directory, exist_ok=True )
+            with open( f"{path}.tmp", 'w', encoding='utf-8' ) as file:
+                json.dump( entry, file )
+            os.replace( f"{path}.tmp", path )
+        except OSError as e:
+            log.Warning( f"Unable to save to the cache in {self.directory}: {e}" )
+            return self
+        return self.Evict()
+
+    def Evict( self ):
+        try:
+            with os.scandir( self.directory ) as entries:
+                files = [ ( entry.stat().st_mtime, entry.stat().st_size, entry.path ) for entry in entries if entry.name.endswith( '.json' ) ]
+        except OSError:
+            return self
+
+        size = sum( file[1] for file in files )
+        for modified, fileSize, path in sorted( files ):
+            if size <= self.maxBytes:
+                break
+            try:
+                os.remove( path )
+                size = size - fileSize
+            except OSError:
+                pass
+        return self
+
+class Timecode:
+    """
+    Frame <-> timecode conversion for one frame rate. Timecodes count frames at the
+    nominal (rounded) rate, with drop-frame numbering for 29.97 and 59.94 when asked.
+    Seconds and frames within a minute are looked up from a table built once per rate
+    and hours / minutes strings are memoized, so formatting a frame is a couple of
+    divisions and a string join. ToTimecodes / ToFrames convert whole lists at once,
+    using NumPy for the arithmetic when it's available.
+    """
+    def __init__( self, frameRate, dropFrame=False ):
+        self.frameRate = float( frameRate )
+        self.fps = int( round( self.frameRate ) )
+        self.dropFrame = bool( dropFrame ) and self.fps % 30 == 0 and self.frameRate != self.fps
+        self.dropped = self.fps // 15 if self.dropFrame else 0
+        self.framesPerMinute = self.fps * 60
+        self.framesPer10Minutes = self.framesPerMinute * 10 - self.dropped * 9
+        self.framesPerDroppedMinute = self.framesPerMinute - self.dropped
+
+        separator = ';' if self.dropFrame else ':'
+        self.seconds = [
+            f"{seconds:02d}{separator}{frames:02d}"
+            for seconds in range( 60 ) for frames in range( self.fps )
+        ]
+        self.minutes = {}
+
+    def Display( self, frames ):
+        # Drop-frame skips frame numbers, not frames, so work out the displayed frame count
+        if not self.dropped:
+            return frames
+        tens, remainder = divmod( frames, self.framesPer10Minutes )
+        if remainder > self.dropped:
+            return frames + self.dropped * 9 * tens + self.dropped * ( ( remainder - self.dropped ) // self.framesPerDroppedMinute )
+        return frames + self.dropped * 9 * tens
+
+    def Minutes( self, minutes ):
+        prefix = self.minutes.get( minutes )
+        if prefix is None:
+            hours, minute = divmod( minutes, 60 )
+            prefix = self.minutes[ minutes ] = f"{hours:02d}:{minute:02d}:"
+        return prefix
+
+    def ToTimecode( self, frames ):
+        frames = int( frames )
+        if frames < 0:
+            return '-' + self.ToTimecode( -frames )
+        minutes, remainder = divmod( self.Display( frames ), self.framesPerMinute )
+        return self.Minutes( minutes ) + self.seconds[ remainder ]
+
+    def ToTimecodes( self, frames ):
+        np = GetNumPy()
+        if not np:
+            return [ self.ToTimecode( frame ) for frame in frames ]
+
+        frames = np.asarray( frames, dtype=np.int64 )
+        if frames.size and frames.min() < 0:
+            return [ self.ToTimecode( frame ) for frame in frames.tolist() ]
+
+        if self.dropped:
+            tens, remainder = np.divmod( frames, self.framesPer10Minutes )
+            frames = frames + self.dropped * 9 * tens + np.where(
+                remainder > self.dropped,
+                self.dropped * ( ( remainder - self.dropped ) // self.framesPerDroppedMinute ),
+                0
+            )
+        minutes, remainder = np.divmod( frames, self.framesPerMinute )
+        seconds = self.seconds
+        minute = self.Minutes
+        return [ minute( m ) + seconds[ r ] for m, r in zip( minutes.tolist(), remainder.tolist() ) ]
+
+    def MinuteStart( self, totalMinutes ):
+        return totalMinutes * self.framesPerMinute - self.dropped * ( totalMinutes - totalMinutes // 10 )
+
+    def ToFrames( self, timecode ):
+        timecode = timecode.strip()
+        if timecode.startswith( '-' ):
+            return -self.ToFrames( timecode[1:] )
+        hours, minutes, seconds, frames = ( int( part ) for part in re.split( r'[:;.]', timecode ) )
+        return self.MinuteStart( hours * 60 + minutes ) + seconds * self.fps + frames
+
+    def ToFramesBatch( self, timecodes ):
+        # Most timecodes are HH:MM:SS:FF, those are sliced and share the start of their minute
+        minuteStarts = {}
+        fps = self.fps
+        frames = []
+        for timecode in timecodes:
+            if len( timecode ) != 11:
+                frames.append( self.ToFrames( timecode ) )
+                continue
+            start = minuteStarts.get( timecode[:5] )
+            if start is None:
+                start = minuteStarts[ timecode[:5] ] = self.MinuteStart( int( timecode[:2] ) * 60 + int( timecode[3:5] ) )
+            frames.append( start + int( timecode[6:8] ) * fps + int( timecode[9:11] ) )
+        return frames
+
+class TimelineContext:
+    """
+    Snapshot of the project and timeline settings needed to mark and queue clips.
+    Settings are fetched once, on first use, instead of on every call through the
+    scripting bridge. Call Invalidate() when the project or timeline changes.
+    """
+    settings = ( 'frameRate', 'dropFrame', 'timecode', 'height', 'width', 'startFrame', 'endFrame', 'aspectRatio' )
+
+    def __init__( self, project, timeline ):
+        self.project = project
+        self.timeline = timeline
+
+    def Invalidate( self, project=None, timeline=None ):
+        if project is not None:
+            self.project = project
+        if timeline is not None:
+            self.timeline = timeline
+        for name in self.settings:
+            self.__dict__.pop( name, None )
+        return self
+
+    def Load( self ):
+        self.frameRate = float( self.project.GetSetting('timelineFrameRate') )
+        self.dropFrame = str( self.project.GetSetting('timelineDropFrameTimecode') ) == '1'
+        self.timecode = Timecode( self.frameRate, self.dropFrame )
+        self.height = int( self.project.GetSetting('timelineResolutionHeight') )
+        self.width = int( self.project.GetSetting('timelineResolutionWidth') )
+        self.startFrame = int( self.timeline.GetStartFrame() )
+        self.endFrame = int( self.timeline.GetEndFrame() )
+        self.aspectRatio = CalculateAspectRatio( self.height, self.width )
+        return self
+
+    def __getattr__( self, name ):
+        # Only called for settings that haven't been loaded since the last Invalidate()
+        if name in TimelineContext.settings:
+            return getattr( self.Load(), name )
+        raise AttributeError( name )
+
+class RenderQueueBuilder:
+    """
+    Adds render jobs to a project. The settings shared by every job (or a named render
+    preset) are applied once, after that only the settings that change between jobs
+    are pushed before each AddRenderJob call.
+    """
+    def __init__( self, project, settings, preset=False ):
+        self.project = project
+        self.settings = settings
+        self.preset = preset
+        self.applied = False
+        self.current = {}
+        self.timings = []
+        self.jobs = []
+        self.failed = 0
+        self.setup = 0.0
+
+    def Apply( self ):
+        started = time.perf_counter()
+
+        if self.preset and not self.project.LoadRenderPreset( self.preset ):
+            raise ValueError( f"Unable to load render preset '{self.preset}'." )
+
+        # Left unapplied when Resolve refuses the settings, the next job tries again
+        if self.project.SetRenderSettings( self.settings ):
+            self.current = dict( self.settings )
+            self.applied = True
+        else:
+            log.Warning( 'Unable to apply the shared render settings.' )
+        self.setup = self.setup + time.perf_counter() - started
+        return self
+
+    def AddJob( self, inPoint, outPoint, fileName ):
+        if not self.applied:
+            self.Apply()
+
+        started = time.perf_counter()
+
+        job = {
+            "MarkIn": int( inPoint ),
+            "MarkOut": int( outPoint ),
+            "CustomName": fileName,
+        }
+        delta = { key: value for key, value in job.items() if self.current.get( key ) != value }
+
+        # A job added after its settings failed would get the previous clip's in / out points and name
+        jobId = None
+        if self.applied:
+            if delta and not self.project.SetRenderSettings( delta ):
+                log.Warning( 'Unable to set the render settings for a job', **job )
+            else:
+                self.current.update( delta )
+                jobId = self.project.AddRenderJob()
+                if not jobId:
+                    # The settings may not have reached Resolve (e.g. merged by a BridgeScheduler), send them all next time
+                    for key in job:
+                        self.current.pop( key, None )
+
+        if jobId:
+            self.jobs.append( ( jobId, job['MarkOut'] - job['MarkIn'] ) )
+        else:
+            self.failed = self.failed + 1
+
+        self.timings.append( time.perf_counter() - started )
+        return jobId
+
+    def Report( self ):
+        jobs = len( self.timings )
+        total = self.setup + sum( self.timings )
+        return {
+            'added'     : jobs - self.failed,
+            'failed'    : self.failed,
+            'setup'     : self.setup,
+            'total'     : total,
+            'average'   : sum( self.timings ) / jobs if jobs else 0.0,
+            'slowest'   : max( self.timings, default=0.0 ),
+            'timings'   : self.timings,
+            'jobs'      : self.jobs,
+        }
+
+class RenderJobIndex:
+    """
+    Hash index of the jobs already in a project's render queue, keyed on timeline,
+    MarkIn, MarkOut, TargetDir and CustomName. Names are compared without the clip
+    index prefix and the numbered suffix FilenamePlanner adds, so a clip that was only
+    renumbered by markers added or removed before it still counts as queued.
+    """
+    prefix = re.compile( r'^\d+_' )
+    suffix = re.compile( r'_\d+$' )
+
+    def __init__( self, project ):
+        self.jobs = {}
+        for job in project.GetRenderJobList() or []:
+            name = job.get( 'CustomName' ) or os.path.splitext( job.get( 'OutputFilename', '' ) )[0]
+            key = self.Key( job.get( 'TimelineName' ), job.get( 'MarkIn' ), job.get( 'MarkOut' ), job.get( 'TargetDir' ), name )
+            self.jobs[ key ] = job.get( 'JobId' )
+
+    def Key( self, timelineName, markIn, markOut, targetDir, fileName ):
+        name = self.suffix.sub( '', self.prefix.sub( '', fileName.lower() ) )
+        return ( timelineName, int( markIn or 0 ), int( markOut or 0 ), os.path.normcase( os.path.normpath( targetDir or '' ) ), name )
+
+    def Find( self, timelineName, markIn, markOut, targetDir, fileName ):
+        return self.jobs.get( self.Key( timelineName, markIn, markOut, targetDir, fileName ) )
+
+class QueueJournal:
+    """
+    Write-ahead journal of render queue submissions for one timeline and render
+    location, one JSON line per clip: planned (with its filename) before queueing
+    starts, then queued with its job id or failed. Lines are buffered and written in
+    batches of batchSize, and always when queueing stops. Load() returns the latest
+    record per clip, so a resumed run can skip clips that already got a job id and
+    reuse the filenames planned for the rest. The journal is deleted once every clip
+    got a job, journals left behind are deleted after maxAge seconds.
+    """
+    def __init__( self, path, batchSize=50, maxAge=30 * 24 * 3600 ):
+        self.path = path
+        self.batchSize = batchSize
+        self.maxAge = maxAge
+        self.pending = []
+
+    def Key( self, clip ):
+        return f"{clip['inPoint']}-{clip['outPoint']}"
+
+    def Load( self ):
+        records = {}
+        try:
+            with open( self.path, encoding='utf-8' ) as file:
+                for line in file:
+                    try:
+                        record = json.loads( line )
+                    except ValueError:
+                        # A line cut short by a crash
+                        continue
+                    records[ record['key'] ] = dict( records.get( record['key'], {} ), **record )
+        except OSError:
+            pass
+        return records
+
+    def Start( self, clips, fileNames, resume=False ):
+        # The plan is written straight away, before any job is added
+        if not resume:
+            self.Clear()
+        self.Evict()
+        for clip, fileName in zip( clips, fileNames ):
+            self.Record( clip, fileName=fileName, status='planned' )
+        return self.Flush()
+
+    def Record( self, clip, **values ):
+        self.pending.append( json.dumps( dict( values, key=self.Key( clip ) ) ) )
+        if len( self.pending ) >= self.batchSize:
+            self.Flush()
+        return self
+
+    def Flush( self ):
+        if not self.pending:
+            return self
+        try:
+            os.makedirs( os.path.dirname( self.path ), exist_ok=True )
+            with open( self.path, 'a', encoding='utf-8' ) as file:
+                file.write( '\n'.join( self.pending ) + '\n' )
+                file.flush()
+                os.fsync( file.fileno() )
+            self.pending = []
+        except OSError as e:
+            log.Warning( f"Unable to write the queue journal {self.path}: {e}" )
+        return self
+
+    def Clear( self ):
+        self.pending = []
+        try:
+            os.remove( self.path )
+        except OSError:
+            pass
+        return self
+
+    def Evict( self ):
+        # Journals of other timelines / render locations nobody resumed
+        expired = time.time() - self.maxAge
+        try:
+            with os.scandir( os.path.dirname( self.path ) ) as entries:
+                for entry in entries:
+                    if entry.name.endswith( '.jsonl' ) and entry.stat().st_mtime < expired:
+                        os.remove( entry.path )
+        except OSError:
+            pass
+        return self
+
+class RenderMonitor:
+    """
+    Starts rendering a set of queued jobs and follows their progress from a background
+    thread. Resolve renders jobs one after another, so each poll only asks for the
+    status of the job currently rendering. The poll interval backs off while nothing
+    changes and tightens again when progress is made, staying between minInterval and
+    maxInterval seconds so polling doesn't compete with the render for CPU.
+    """
+    finished = ( 'Complete', 'Failed', 'Cancelled' )
+
+    def __init__( self, project, jobs, minInterval=0.5, maxInterval=10.0 ):
+        self.project = project
+        self.jobs = [ { 'jobId': jobId, 'frames': frames, 'status': 'Queued', 'started': None, 'ended': None, 'wallTime': None } for jobId, frames in jobs ]
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.interval = minInterval
+        self.polls = 0
+        self.started = None
+        self.ended = None
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def Start( self ):
+        # Resolve renders the whole queue when given no job ids, so there's nothing to start
+        if not self.jobs:
+            return self
+        self.started = time.perf_counter()
+        if not self.project.StartRendering( [ job['jobId'] for job in self.jobs ], False ):
+            raise ValueError( 'Unable to start rendering.' )
+        self.thread = threading.Thread( target=self.Poll, name='MarkerMan render monitor', daemon=True )
+        self.thread.start()
+        return self
+
+    def Poll( self ):
+        pending = list( self.jobs )
+        lastProgress = None
+
+        while pending and not self.stopping.is_set():
+            job = pending[0]
+            status = self.Update( job )
+
+            progress = ( job['jobId'], job['status'], status.get( 'CompletionPercentage' ) )
+            if job['status'] in self.finished:
+                pending.pop( 0 )
+                self.interval = self.minInterval
+                continue
+
+            self.polls = self.polls + 1
+            if not self.project.IsRenderingInProgress():
+                # Rendering stopped without this job finishing, e.g. it was stopped in Resolve
+                break
+
+            if progress != lastProgress:
+                self.interval = max( self.minInterval, self.interval / 2 )
+            else:
+                self.interval = min( self.maxInterval, self.interval * 1.5 )
+            lastProgress = progress
+
+            # Don't sleep past the point Resolve expects the job to finish
+            remaining = status.get( 'EstimatedTimeRemainingInMs' )
+            interval = self.interval
+            if remaining:
+                interval = max( self.minInterval, min( interval, remaining / 1000 ) )
+            self.stopping.wait( interval )
+
+        # Jobs may have finished since they were last read, the ones that didn't won't render now
+        for job in pending:
+            self.Update( job )
+            if job['status'] not in self.finished:
+                job['status'] = 'Cancelled'
+        self.ended = time.perf_counter()
+
+    def Update( self, job ):
+        # Reads the job's status from Resolve, returns it
+        status = self.project.GetRenderJobStatus( job['jobId'] ) or {}
+        self.polls = self.polls + 1
+        now = time.perf_counter()
+
+        job['status'] = status.get( 'JobStatus', job['status'] )
+        if job['started'] is None and job['status'] not in ( 'Queued', 'Ready' ):
+            job['started'] = now
+        if job['status'] in self.finished and job['ended'] is None:
+            job['ended'] = now
+            # Resolve reports the actual render time once a job completes
+            taken = status.get( 'TimeTakenToRenderInMs' )
+            job['wallTime'] = taken / 1000 if taken else now - ( job['started'] or now )
+        return status
+
+    def Wait( self, timeout=None ):
+        if self.thread:
+            self.thread.join( timeout )
+        return not self.IsRunning()
+
+    def IsRunning( self ):
+        return self.thread is not None and self.thread.is_alive()
+
+    def Stop( self ):
+        self.stopping.set()
+        self.project.StopRendering()
+        return self.Wait()
+
+    def Report( self, path=None ):
+        # Failed and cancelled jobs have a wall time too, but didn't render their frames
+        done = [ job for job in self.jobs if job['status'] == 'Complete' and job['wallTime'] ]
+        frames = sum( job['frames'] for job in done )
+        renderTime = sum( job['wallTime'] for job in done )
+        report = {
+            'jobs'          : [
+                {
+                    'jobId'     : job['jobId'],
+                    'status'    : job['status'],
+                    'frames'    : job['frames'],
+                    'wallTime'  : job['wallTime'],
+                    'fps'       : job['frames'] / job['wallTime'] if job['wallTime'] else None,
+                }
+                for job in self.jobs
+            ],
+            'completed'     : sum( 1 for job in self.jobs if job['status'] == 'Complete' ),
+            'failed'        : sum( 1 for job in self.jobs if job['status'] in ( 'Failed', 'Cancelled' ) ),
+            'frames'        : frames,
+            'wallTime'      : ( self.ended or time.perf_counter() ) - self.started if self.started else 0.0,
+            'fps'           : frames / renderTime if renderTime else None,
+            'polls'         : self.polls,
+        }
+
+        if path:
+            with open( path, 'w', encoding='utf-8' ) as file:
+                json.dump( report, file, indent=4 )
+        return report
+
+class ChunkedTask:
+    """
+    Runs a generator of steps a slice at a time, so a long loop can be driven from a UI
+    timer without blocking the event loop, or run straight through when headless. The
+    generator yields ( done, total ) after each step and returns its result. Cancel()
+    closes the generator at its next yield, so it always stops between two steps.
+    """
+    def __init__( self, steps ):
+        self.steps = steps
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.finished = False
+        self.cancelled = False
+        self.started = None
+
+    def Step( self, budget=None ):
+        """
+        Runs steps for up to budget seconds, or until finished when budget is None.
+        Returns True while there are steps left.
+        """
+        if self.started is None:
+            self.started = time.perf_counter()
+        deadline = None if budget is None else time.perf_counter() + budget
+        while not self.finished:
+            if self.cancelled:
+                self.steps.close()
+                self.finished = True
+                break
+            try:
+                self.done, self.total = next( self.steps )
+            except StopIteration as e:
+                self.result = e.value
+                self.finished = True
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return not self.finished
+
+    def Run( self ):
+        self.Step()
+        return self.result
+
+    def Cancel( self ):
+        self.cancelled = True
+
+    def Progress( self ):
+        """
+        Fraction done, steps per second and estimated seconds left.
+        """
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = ( self.total - self.done ) / rate if rate > 0 else None
+        return ( self.done / self.total if self.total else 0.0 ), rate, remaining
+
+class MarkerTransactionError(Exception):
+    pass
+
+class MarkerTransaction:
+    """
+    Moves a timeline from its current markers to a desired set of markers with as few
+    scripting bridge calls as possible: unchanged markers are left alone, markers where
+    only the custom data changed are updated in place and colours that are cleared
+    completely are deleted with a single DeleteMarkersByColor call.
+
+    Every call that changes the timeline is recorded in a journal, if one fails the
+    journal is played back to restore the original markers and a MarkerTransactionError
+    is raised. Rollback() can also be used to undo a transaction that was applied.
+    """
+    fields = ( 'color', 'name', 'note', 'duration' )
+
+    def __init__( self, timeline, current=None ):
+        self.timeline = timeline
+        self.current = current if current is not None else timeline.GetMarkers()
+        self.journal = []
+        self.calls = 0
+        self.stats = {}
+
+    def Plan( self, desired ):
+        """
+        Returns the operations needed, as ( action, frame, marker ) tuples in the order
+        they'll be applied: deletes, custom data updates, then adds.
+        """
+        deletes = []
+        updates = []
+        adds = []
+
+        for frame, marker in self.current.items():
+            if frame not in desired:
+                deletes.append( frame )
+        for frame, marker in desired.items():
+            existing = self.current.get( frame )
+            if existing is None:
+                adds.append( frame )
+            elif any( existing.get( field ) != marker.get( field ) for field in self.fields ):
+                deletes.append( frame )
+                adds.append( frame )
+            elif existing.get( 'customData', '' ) != marker.get( 'customData', '' ):
+                updates.append( frame )
+
+        # Clear whole colours in one call when none of their markers survive
+        deleting = set( deletes )
+        colors = {}
+        for frame, marker in self.current.items():
+            colors.setdefault( marker['color'], [] ).append( frame )
+
+        operations = []
+        if deleting and len( deleting ) == len( self.current ) and len( colors ) > 1:
+            operations.append( ( 'deleteColor', 'All', None ) )
+            deleting = set()
+        for color, frames in colors.items():
+            if len( frames ) > 1 and all( frame in deleting for frame in frames ):
+                operations.append( ( 'deleteColor', color, None ) )
+                deleting.difference_update( frames )
+        operations += [ ( 'delete', frame, self.current[ frame ] ) for frame in deletes if frame in deleting ]
+        operations += [ ( 'update', frame, desired[ frame ] ) for frame in updates ]
+        operations += [ ( 'add', frame, desired[ frame ] ) for frame in adds ]
+        return operations
+
+    def Apply( self, desired ):
+        started = time.perf_counter()
+        operations = self.Plan( desired )
+
+        for action, frame, marker in operations:
+            self.journal.append( ( action, frame, marker ) )
+            if not self.Call( action, frame, marker ):
+                self.Rollback()
+                raise MarkerTransactionError( f"Unable to {action} marker at frame {frame}, marker changes were rolled back." )
+
+        elapsed = time.perf_counter() - started
+
+        changed = set()
+        for action, frame, marker in operations:
+            if action == 'deleteColor':
+                changed.update( markerFrame for inverse, markerFrame, details in self.Inverse( action, frame, marker ) )
+            else:
+                changed.add( frame )
+
+        self.stats = {
+            'markers'           : len( changed ),
+            'calls'             : self.calls,
+            'elapsed'           : elapsed,
+            'markersPerSecond'  : len( changed ) / elapsed if elapsed else 0.0,
+        }
+        return self.stats
+
+    def Call( self, action, frame, marker ):
+        self.calls = self.calls + 1
+        if action == 'add':
+            return self.timeline.AddMarker(
+                frame,
+                marker['color'],
+                marker['name'],
+                marker['note'],
+                marker['duration'],
+                marker.get( 'customData', '' )
+            )
+        if action == 'delete':
+            return self.timeline.DeleteMarkerAtFrame( frame )
+        if action == 'deleteColor':
+            return self.timeline.DeleteMarkersByColor( frame )
+        if action == 'update':
+            return self.timeline.UpdateMarkerCustomData( frame, marker.get( 'customData', '' ) )
+        raise ValueError( f"Unknown marker action '{action}'" )
+
+    def Inverse( self, action, frame, marker ):
+        if action == 'add':
+            return [ ( 'delete', frame, marker ) ]
+        if action == 'delete':
+            return [ ( 'add', frame, marker ) ]
+        if action == 'update':
+            return [ ( 'update', frame, self.current[ frame ] ) ]
+        return [
+            ( 'add', markerFrame, details )
+            for markerFrame, details in self.current.items()
+            if frame == 'All' or details['color'] == frame
+        ]
+
+    def Rollback( self ):
+        """
+        Plays the journal back in reverse. Calls that fail here are expected for the
+        operation that failed (it may not have changed anything) and are ignored.
+        """
+        while self.journal:
+            for action, frame, marker in self.Inverse( *self.journal.pop() ):
+                self.Call( action, frame, marker )
+        return self
+
+class ClipTable:
+    """
+    Columnar storage for marked clips. In / out points and frame counts are kept in
+    integer arrays, colours are interned and names / notes are read from the marker
+    each clip was marked from. Timecode and filename strings are only formatted when
+    a clip is displayed or submitted, by the formatter (normally the MarkerManager).
+
+    Iterating the table yields ClipRow views which can be read like the clip dicts
+    MarkClip used to build.
+    """
+    __slots__ = ( 'formatter', 'indexes', 'inPoints', 'outPoints', 'frames', 'colors', 'markers' )
+
+    def __init__( self, formatter ):
+        self.formatter = formatter
+        self.Clear()
+
+    def Clear( self ):
+        self.indexes = array( 'q' )
+        self.inPoints = array( 'q' )
+        self.outPoints = array( 'q' )
+        self.frames = array( 'q' )
+        self.colors = []
+        self.markers = []
+        return self
+
+    def Add( self, inPoint, outPoint, marker, index ):
+        inPoint = int( inPoint )
+        outPoint = int( outPoint )
+        self.indexes.append( index )
+        self.inPoints.append( inPoint )
+        self.outPoints.append( outPoint )
+        self.frames.append( outPoint - inPoint )
+        self.colors.append( sys.intern( marker['color'] ) )
+        self.markers.append( marker )
+
+    def Extend( self, inPoints, outPoints, markers, index ):
+        # Add() for a batch of clips numbered from index, the points can be NumPy arrays
+        if hasattr( inPoints, 'tobytes' ):
+            self.inPoints.frombytes( inPoints.astype( 'int64' ).tobytes() )
+            self.outPoints.frombytes( outPoints.astype( 'int64' ).tobytes() )
+            self.frames.frombytes( ( outPoints - inPoints ).astype( 'int64' ).tobytes() )
+        else:
+            inPoints = [ int( inPoint ) for inPoint in inPoints ]
+            outPoints = [ int( outPoint ) for outPoint in outPoints ]
+            self.inPoints.extend( inPoints )
+            self.outPoints.extend( outPoints )
+            self.frames.extend( outPoint - inPoint for inPoint, outPoint in zip( inPoints, outPoints ) )
+        self.indexes.extend( range( index, index + len( markers ) ) )
+        self.colors.extend( sys.intern( marker['color'] ) for marker in markers )
+        self.markers.extend( markers )
+
+    def Get( self, position, key ):
+        if key == 'index':
+            return f"{self.indexes[ position ]:002d}"
+        if key == 'inPoint':
+            return self.inPoints[ position ]
+        if key == 'outPoint':
+            return self.outPoints[ position ]
+        if key == 'frames':
+            return self.frames[ position ]
+        if key == 'color':
+            return self.colors[ position ]
+        if key == 'name':
+            return self.markers[ position ]['name']
+        if key == 'note':
+            return self.markers[ position ]['note']
+        if key == 'duration':
+            return self.formatter.CalculateDuration( self.inPoints[ position ], self.outPoints[ position ] )
+        if key == 'filename':
+            return f"{self.indexes[ position ]:02d}_{self.formatter.SanitizeFilename( self.markers[ position ]['name'] )}"
+        raise KeyError( key )
+
+    def __len__( self ):
+        return len( self.inPoints )
+
+    def __getitem__( self, position ):
+        if position < 0:
+            position = position + len( self )
+        if not 0 <= position < len( self ):
+            raise IndexError( 'clip index out of range' )
+        return ClipRow( self, position )
+
+    def __iter__( self ):
+        for position in range( len( self ) ):
+            yield ClipRow( self, position )
+
+    def AsDicts( self ):
+        return [ row.AsDict() for row in self ]
+
+    def Copy( self ):
+        table = ClipTable( self.formatter )
+        table.indexes = array( 'q', self.indexes )
+        table.inPoints = array( 'q', self.inPoints )
+        table.outPoints = array( 'q', self.outPoints )
+        table.frames = array( 'q', self.frames )
+        table.colors = list( self.colors )
+        table.markers = list( self.markers )
+        return table
+
+    def Take( self, positions ):
+        # New table with the clips at positions, keeping their index
+        table = ClipTable( self.formatter )
+        table.indexes = array( 'q', ( self.indexes[ position ] for position in positions ) )
+        table.inPoints = array( 'q', ( self.inPoints[ position ] for position in positions ) )
+        table.outPoints = array( 'q', ( self.outPoints[ position ] for position in positions ) )
+        table.frames = array( 'q', ( self.frames[ position ] for position in positions ) )
+        table.colors = [ self.colors[ position ] for position in positions ]
+        table.markers = [ self.markers[ position ] for position in positions ]
+        return table
+
+    def Columns( self ):
+        # The integer columns as plain lists, Load() adds them back
+        return {
+            'indexes'   : self.indexes.tolist(),
+            'inPoints'  : self.inPoints.tolist(),
+            'outPoints' : self.outPoints.tolist(),
+        }
+
+    def Load( self, columns, markers ):
+        # Appends, like marking into the table does
+        self.indexes.extend( columns['indexes'] )
+        self.inPoints.extend( columns['inPoints'] )
+        self.outPoints.extend( columns['outPoints'] )
+        self.frames.extend( outPoint - inPoint for inPoint, outPoint in zip( columns['inPoints'], columns['outPoints'] ) )
+        self.markers.extend( markers )
+        self.colors.extend( sys.intern( marker['color'] ) for marker in markers )
+        return self
+
+class ClipRow:
+    """
+    View of a single clip in a ClipTable.
+    """
+    __slots__ = ( 'table', 'position' )
+
+    keys = ( 'index', 'inPoint', 'outPoint', 'filename', 'name', 'note', 'color', 'frames', 'duration' )
+
+    def __init__( self, table, position ):
+        self.table = table
+        self.position = position
+
+    def __getitem__( self, key ):
+        return self.table.Get( self.position, key )
+
+    def get( self, key, default=None ):
+        try:
+            return self.table.Get( self.position, key )
+        except KeyError:
+            return default
+
+    def AsDict( self ):
+        return { key: self.table.Get( self.position, key ) for key in self.keys }
+
+    def __repr__( self ):
+        return repr( self.AsDict() )
+
+class MarkerIndex:
+    """
+    Markers from timeline.GetMarkers() sorted by frame, with a posting list of positions
+    per colour and a flag for markers still using Resolve's default 'Marker N' name.
+    Colour and frame range queries use bisect, so they cost O(log n + k) instead of a
+    fresh GetMarkers() call and a scan over every marker.
+    """
+    def __init__( self, markers={} ):
+        self.frames = sorted( markers )
+        self.markers = [ markers[ frame ] for frame in self.frames ]
+        self.unnamed = bytearray( marker['name'].startswith('Marker ') for marker in self.markers )
+        self.byColor = {}
+        self.colorFrames = {}
+        for position, marker in enumerate( self.markers ):
+            self.byColor.setdefault( marker['color'], [] ).append( position )
+            self.colorFrames.setdefault( marker['color'], [] ).append( self.frames[ position ] )
+
+    def __len__( self ):
+        return len( self.frames )
+
+    def Positions( self, colors=None, start=None, end=None ):
+        """
+        Positions of the markers with one of the given colours (all colours if None)
+        from frame start up to, but not including, frame end, in frame order.
+        """
+        if colors is not None and type( colors ) != list:
+            colors = [ colors ]
+
+        if colors is None:
+            lo = 0 if start is None else bisect.bisect_left( self.frames, start )
+            hi = len( self.frames ) if end is None else bisect.bisect_left( self.frames, end )
+            return list( range( lo, hi ) )
+
+        postings = []
+        for color in colors:
+            if color not in self.byColor:
+                continue
+            frames = self.colorFrames[ color ]
+            lo = 0 if start is None else bisect.bisect_left( frames, start )
+            hi = len( frames ) if end is None else bisect.bisect_left( frames, end )
+            if lo < hi:
+                postings.append( self.byColor[ color ][ lo:hi ] )
+
+        if len( postings ) == 1:
+            return postings[0]
+        return list( heapq.merge( *postings ) )
+
+    def Select( self, colors=None, start=None, end=None ):
+        return { self.frames[ position ]: self.markers[ position ] for position in self.Positions( colors, start, end ) }
+
+class ClipChangeSet:
+    """
+    Clips added, removed and modified since the previous marker snapshot of a timeline.
+    Added and modified clips are rows of the new clip table, removed clips are rows of
+    the previous one. Clips are matched on their in-point, a clip that only moved
+    index because clips were added or removed before it doesn't count as modified.
+    """
+    def __init__( self ):
+        self.added = []
+        self.removed = []
+        self.modified = []
+
+    def __len__( self ):
+        return len( self.added ) + len( self.removed ) + len( self.modified )
+
+    def Changed( self ):
+        # Clips that need (re)displaying or (re)queueing
+        return sorted( self.added + self.modified, key=lambda clip: clip['inPoint'] )
+
+class ClipValidation:
+    """
+    Problems in a set of marked clips: out-points before their in-point, zero length
+    clips, clips overlapping an earlier one and clips outside the timeline. Clips are
+    sorted by in-point once and swept in order, remembering the clip that reaches
+    furthest so far, so checking is O(n log n). Each list holds clip positions,
+    overlaps holds ( position, earlier position ) pairs.
+    """
+    def __init__( self, inPoints, outPoints, startFrame, endFrame ):
+        self.inverted = []
+        self.empty = []
+        self.overlaps = []
+        self.outOfRange = []
+        self.inPoints = inPoints
+        self.outPoints = outPoints
+
+        reach = None
+        reaching = -1
+        for position in sorted( range( len( inPoints ) ), key=lambda position: ( inPoints[ position ], outPoints[ position ] ) ):
+            inPoint = inPoints[ position ]
+            outPoint = outPoints[ position ]
+            if outPoint < inPoint:
+                self.inverted.append( position )
+                continue
+            if outPoint == inPoint:
+                self.empty.append( position )
+                continue
+            if inPoint < startFrame or outPoint > endFrame:
+                self.outOfRange.append( position )
+            # Out-points are exclusive, a clip may start on the frame the previous one ends
+            if reach is not None and inPoint < reach:
+                self.overlaps.append( ( position, reaching ) )
+            if reach is None or outPoint > reach:
+                reach = outPoint
+                reaching = position
+
+    def __len__( self ):
+        return len( self.inverted ) + len( self.empty ) + len( self.overlaps ) + len( self.outOfRange )
+
+    def Summary( self ):
+        counts = [
+            ( len( self.overlaps ), 'overlapping' ),
+            ( len( self.inverted ), 'ending before they start' ),
+            ( len( self.empty ), 'zero length' ),
+            ( len( self.outOfRange ), 'outside the timeline' ),
+        ]
+        return ', '.join( f"{count} {problem}" for count, problem in counts if count )
+
+    def Describe( self, clips, timecode ):
+        """
+        One line per problem, naming the clips by index and name.
+        """
+        def _clip( position ):
+            return f"#{clips.Get( position, 'index' )} {clips.Get( position, 'name' )} ({timecode( self.inPoints[ position ] )} - {timecode( self.outPoints[ position ] )})"
+
+        lines = [ f"{_clip( position )} overlaps {_clip( earlier )}" for position, earlier in self.overlaps ]
+        lines += [ f"{_clip( position )} ends before it starts" for position in self.inverted ]
+        lines += [ f"{_clip( position )} has no frames" for position in self.empty ]
+        lines += [ f"{_clip( position )} is outside the timeline" for position in self.outOfRange ]
+        return lines
+
+class ClipMarkingEngine:
+    """
+    Batch version of the MarkClipsUsing* loops for very large marker sets. Takes the
+    marker frames in order with their markers, loads frames, durations and whether each
+    marker has been named into NumPy arrays and works out the in / out points with array
+    operations (a plain Python pass without NumPy). Results are ( inPoints, outPoints,
+    positions ) columns, position being the index in markers of the marker a clip takes
+    its details from, in the same order the loops produce them. The columns are NumPy
+    arrays when NumPy is used, so they can go into a ClipTable without a round trip
+    through Python ints.
+    """
+    def __init__( self, frames, markers, startFrame, unnamed=None ):
+        self.startFrame = startFrame
+        self.frames = frames
+        self.markers = markers
+        self.unnamed = unnamed
+        self.np = GetNumPy()
+
+    @staticmethod
+    def FromMarkers( markers, startFrame ):
+        frames = sorted( markers )
+        return ClipMarkingEngine( frames, [ markers[ frame ] for frame in frames ], startFrame )
+
+    @staticmethod
+    def FromIndex( index, startFrame, positions=None ):
+        # Marks the markers at positions of a MarkerIndex (all of them if None), already in frame order
+        if positions is None:
+            return ClipMarkingEngine( index.frames, index.markers, startFrame, index.unnamed )
+        unnamed = index.unnamed
+        return ClipMarkingEngine(
+            [ index.frames[ position ] for position in positions ],
+            [ index.markers[ position ] for position in positions ],
+            startFrame,
+            bytearray( unnamed[ position ] for position in positions ),
+        )
+
+    @staticmethod
+    def Rows( columns ):
+        # ( inPoint, outPoint, position ) tuples, for callers that go clip by clip
+        return list( zip( *( column.tolist() if hasattr( column, 'tolist' ) else column for column in columns ) ) )
+
+    def Unnamed( self ):
+        # 1 for markers still using Resolve's default 'Marker N' name, a MarkerIndex has these already
+        if self.unnamed is None:
+            self.unnamed = bytearray( marker['name'].startswith('Marker ') for marker in self.markers )
+        return self.unnamed
+
+    def DualMarkers( self ):
+        # A named marker opens a clip unless the previous marker opened one, the marker
+        # after it (named or not) closes it. Unnamed markers outside a clip are skipped.
+        count = len( self.frames )
+        if count < 2:
+            return [], [], []
+        unnamed = self.Unnamed()
+
+        if not self.np:
+            # find() skips over unnamed markers without going through them one by one
+            opened = []
+            position = unnamed.find( 0 )
+            while 0 <= position < count - 1:
+                opened.append( position )
+                position = unnamed.find( 0, position + 2 )
+            frames = self.frames
+            return [ frames[ position ] + self.startFrame for position in opened ], [ frames[ position + 1 ] + self.startFrame for position in opened ], opened
+
+        np = self.np
+        frames = np.fromiter( self.frames, dtype=np.int64, count=count )
+        named = np.frombuffer( unnamed, dtype=np.uint8 ) == 0
+        positions = np.arange( count )
+
+        # Within a run of consecutive named markers every other marker opens a clip
+        runStart = np.maximum.accumulate( np.where( named, 0, positions + 1 ) )
+        opens = named & ( ( positions - runStart ) % 2 == 0 )
+        opens[ -1 ] = False
+
+        opened = np.flatnonzero( opens )
+        return frames[ opened ] + self.startFrame, frames[ opened + 1 ] + self.startFrame, opened
+
+    def MarkerDuration( self ):
+        if not self.np:
+            positions = [ position for position, marker in enumerate( self.markers ) if marker.get('duration', 0) > 0 ]
+            frames = self.frames
+            inPoints = [ frames[ position ] + self.startFrame for position in positions ]
+            return inPoints, [ inPoint + self.markers[ position ].get('duration', 0) for inPoint, position in zip( inPoints, positions ) ], positions
+
+        np = self.np
+        count = len( self.frames )
+        frames = np.fromiter( self.frames, dtype=np.int64, count=count )
+        # Floats, so a fractional duration is truncated the same way ClipTable.Add does
+        durations = np.fromiter( ( marker.get('duration', 0) for marker in self.markers ), dtype=np.float64, count=count )
+        positions = np.flatnonzero( durations > 0 )
+        inPoints = frames[ positions ] + self.startFrame
+        return inPoints, ( inPoints + durations[ positions ] ).astype( np.int64 ), positions
+
+class MarkerFile:
+    """
+    Streams markers to and from CSV, JSON Lines and CMX EDL marker lists. Files are read
+    and written a line at a time and timecodes are converted in chunks, so memory use
+    doesn't grow with the length of the log.
+
+    Markers are ( frame, marker ) pairs with frames relative to the start of the timeline,
+    like timeline.GetMarkers(). Timecodes in files are timeline timecodes, startFrame is
+    the timeline's GetStartFrame() used to convert between the two.
+    """
+    formats = { '.csv': 'csv', '.jsonl': 'jsonl', '.json': 'jsonl', '.edl': 'edl' }
+    columns = ( 'timecode', 'frame', 'color', 'name', 'note', 'duration', 'customData' )
+    edlEvent = re.compile( r'^\d+\s+\S+\s+\S+\s+\S+\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)' )
+    edlComment = re.compile( r'\|(\w+):([^|]*)' )
+
+    def __init__( self, path, format=None, frameRate=24.0, startFrame=0, chunkSize=1000, dropFrame=False ):
+        self.path = path
+        self.format = format or self.formats.get( os.path.splitext( path )[1].lower() )
+        if self.format not in self.formats.values():
+            raise ValueError( f"Unknown marker file format for '{path}', expected one of: {', '.join( sorted( set( self.formats.values() ) ) )}" )
+        self.timecode = Timecode( frameRate, dropFrame )
+        self.startFrame = startFrame
+        self.chunkSize = chunkSize
+
+    def Read( self, progress=None ):
+        records = { 'csv': self.ReadCSV, 'jsonl': self.ReadJSONLines, 'edl': self.ReadEDL }[ self.format ]()
+
+        count = 0
+        chunk = []
+        for record in records:
+            chunk.append( record )
+            if len( chunk ) == self.chunkSize:
+                yield from self.ToMarkers( chunk )
+                count = count + len( chunk )
+                chunk = []
+                if progress:
+                    progress( count )
+        if chunk:
+            yield from self.ToMarkers( chunk )
+            count = count + len( chunk )
+            if progress:
+                progress( count )
+
+    def ToMarkers( self, records ):
+        # Timecodes for the whole chunk are converted in one go
+        timecodes = [ record.get( 'timecode' ) for record in records if record.get( 'frame' ) in ( None, '' ) ]
+        frames = iter( self.timecode.ToFramesBatch( timecodes ) )
+
+        for record in records:
+            if record.get( 'frame' ) in ( None, '' ):
+                frame = next( frames ) - self.startFrame
+            else:
+                frame = int( record['frame'] )
+            yield frame, {
+                'color'     : record.get( 'color' ) or 'Blue',
+                'name'      : record.get( 'name' ) or '',
+                'note'      : record.get( 'note' ) or '',
+                'duration'  : int( record.get( 'duration' ) or 1 ),
+                'customData': record.get( 'customData' ) or '',
+            }
+
+    def ReadCSV( self ):
+        with open( self.path, newline='', encoding='utf-8' ) as file:
+            yield from csv.DictReader( file )
+
+    def ReadJSONLines( self ):
+        with open( self.path, encoding='utf-8' ) as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads( line )
+
+    def ReadEDL( self ):
+        # Resolve's marker EDLs have an event line followed by a |C:ResolveColorX |M:name |D:duration comment
+        record = None
+        with open( self.path, encoding='utf-8' ) as file:
+            for line in file:
+                event = self.edlEvent.match( line )
+                if event:
+                    if record:
+                        yield record
+                    record = { 'timecode': event.group( 3 ) }
+                elif record and '|' in line:
+                    fields = dict( ( key, value.strip() ) for key, value in self.edlComment.findall( line ) )
+                    record['color'] = fields.get( 'C', '' ).replace( 'ResolveColor', '' )
+                    record['name'] = fields.get( 'M', '' )
+                    record['duration'] = fields.get( 'D' )
+                    record['note'] = line.split( '|' )[0].strip()
+        if record:
+            yield record
+
+    def Write( self, markers, progress=None, title='Markers' ):
+        """
+        Writes an iterable of ( frame, marker ) pairs, returns the number written.
+        """
+        writer = { 'csv': self.WriteCSV, 'jsonl': self.WriteJSONLines, 'edl': self.WriteEDL }[ self.format ]
+        return writer( self.ToRecords( markers, progress ), title )
+
+    def ToRecords( self, markers, progress=None ):
+        count = 0
+        chunk = []
+        for item in markers:
+            chunk.append( item )
+            if len( chunk ) == self.chunkSize:
+                yield from self.FromMarkers( chunk )
+                count = count + len( chunk )
+                chunk = []
+                if progress:
+                    progress( count )
+        if chunk:
+            yield from self.FromMarkers( chunk )
+            count = count + len( chunk )
+            if progress:
+                progress( count )
+
+    def FromMarkers( self, markers ):
+        timecodes = self.timecode.ToTimecodes( [ self.startFrame + frame for frame, marker in markers ] )
+        for ( frame, marker ), timecode in zip( markers, timecodes ):
+            yield {
+                'timecode'  : timecode,
+                'frame'     : frame,
+                'color'     : marker['color'],
+                'name'      : marker['name'],
+                'note'      : marker['note'],
+                'duration'  : marker['duration'],
+                'customData': marker.get( 'customData', '' ),
+            }
+
+    def WriteCSV( self, records, title ):
+        count = 0
+        with open( self.path, 'w', newline='', encoding='utf-8' ) as file:
+            writer = csv.DictWriter( file, fieldnames=self.columns )
+            writer.writeheader()
+            for record in records:
+                writer.writerow( record )
+                count = count + 1
+        return count
+
+    def WriteJSONLines( self, records, title ):
+        count = 0
+        with open( self.path, 'w', encoding='utf-8' ) as file:
+            for record in records:
+                file.write( json.dumps( record ) + '\n' )
+                count = count + 1
+        return count
+
+    def WriteEDL( self, records, title ):
+        count = 0
+        with open( self.path, 'w', encoding='utf-8' ) as file:
+            file.write( f"TITLE: {title}\nFCM: {'DROP FRAME' if self.timecode.dropFrame else 'NON-DROP FRAME'}\n\n" )
+            for record in records:
+                count = count + 1
+                outPoint = self.timecode.ToTimecode( self.startFrame + record['frame'] + max( int( record['duration'] ), 1 ) )
+                file.write( f"{count:03d}  001      V     C        {record['timecode']} {outPoint} {record['timecode']} {outPoint}  \n" )
+                file.write( f"{record['note']} |C:ResolveColor{record['color']} |M:{record['name']} |D:{record['duration']}\n\n" )
+        return count
+
+class FilenamePlanner:
+    """
+    Works out the final render filename for every clip in a batch before anything is
+    queued. Each distinct marker name is slugified once. Names that collide with each
+    other, or with files already in the render directory (read with a single directory
+    scan), get a numbered suffix. Comparisons ignore case and file extensions, as
+    Resolve adds the extension and macOS / Windows file systems ignore case.
+    """
+    def __init__( self, directory=None ):
+        self.taken = set()
+        if directory:
+            try:
+                with os.scandir( directory ) as entries:
+                    self.taken = { os.path.splitext( entry.name )[0].lower() for entry in entries }
+            except OSError:
+                pass
+
+    def Plan( self, clips, sanitize ):
+        slugs = {}
+        names = []
+        for clip in clips:
+            name = clip['name']
+            if name not in slugs:
+                slugs[ name ] = sanitize( name )
+            names.append( self.Reserve( f"{clip['index']}_{slugs[ name ]}" ) )
+        return names
+
+    def Reserve( self, name ):
+        unique = name
+        count = 2
+        while unique.lower() in self.taken:
+            unique = f"{name}_{count}"
+            count = count + 1
+        self.taken.add( unique.lower() )
+        return unique
+
+class TreeStore:
+    """
+    Columnar backing store for DialogTreeDisplay. Each column is a function returning
+    the cell for a row position, so cells are only formatted for rows that are shown.
+    Sorting and filtering work on row positions in Python, only the current page of
+    rows is ever turned into tree items.
+    """
+    def __init__( self, count, cells, sortKeys=None, filterColumns=None ):
+        self.count = count
+        self.cells = cells
+        self.sortKeys = sortKeys or [ None ] * len( cells )
+        self.filterColumns = filterColumns if filterColumns is not None else range( len( cells ) )
+        self.order = list( range( count ) )
+        self.view = self.order
+        self.filterText = ''
+
+    @staticmethod
+    def FromRows( rows ):
+        # Store for rows that have already been formatted, as lists of cells
+        columns = max( ( len( row ) for row in rows ), default=0 )
+        cells = [ ( lambda position, column=column: rows[ position ][ column ] ) for column in range( columns ) ]
+        return TreeStore( len( rows ), cells )
+
+    def Sort( self, column, descending=False ):
+        key = self.sortKeys[ column ] or self.cells[ column ]
+        self.order = sorted( range( self.count ), key=key, reverse=descending )
+        return self.Filter( self.filterText )
+
+    def Filter( self, text ):
+        self.filterText = text.strip().lower()
+        if not self.filterText:
+            self.view = self.order
+        else:
+            self.view = [
+                position for position in self.order
+                if any( self.filterText in str( self.cells[ column ]( position ) ).lower() for column in self.filterColumns )
+            ]
+        return self
+
+    def PageCount( self, pageSize ):
+        return max( 1, -( -len( self.view ) // pageSize ) )
+
+    def Page( self, page, pageSize ):
+        return [
+            [ cell( position ) for cell in self.cells ]
+            for position in self.view[ page * pageSize:( page + 1 ) * pageSize ]
+        ]
+
+class ApiProfiler:
+    """
+    Opt-in instrumentation of the scripting API. Handles wrapped with Wrap count calls
+    per method and keep a latency histogram (power of two buckets of microseconds),
+    and optionally record every call for a Chrome trace (chrome://tracing, Perfetto).
+    When profiling is off nothing is wrapped, so there is no overhead at all.
+    """
+    def __init__( self, trace=False ):
+        self.trace = trace
+        self.stats = {}
+        self.events = []
+        self.start = time.perf_counter()
+
+    def Wrap( self, target, name, children=True ):
+        """
+        Returns a proxy for target. With children, objects returned by its methods
+        (projects, timelines, ...) are wrapped as well.
+        """
+        if target is None or target is False or isinstance( target, ApiProxy ):
+            return target
+        return ApiProxy( target, name, self, children )
+
+    def Record( self, name, started, elapsed ):
+        stat = self.stats.get( name )
+        if stat is None:
+            stat = self.stats[ name ] = [ 0, 0.0, 0.0, [ 0 ] * 32 ]
+        stat[0] += 1
+        stat[1] += elapsed
+        if elapsed > stat[2]:
+            stat[2] = elapsed
+        stat[3][ min( 31, int( elapsed * 1000000 ).bit_length() ) ] += 1
+        if self.trace:
+            self.events.append( ( name, started, elapsed, threading.get_ident() ) )
+
+    def Report( self ):
+        """
+        Per method: calls, total / average / max seconds and the latency histogram as
+        { '<upper bound in µs>': count } for the non-empty buckets, slowest methods first.
+        """
+        report = {}
+        for name, ( count, total, slowest, buckets ) in sorted( self.stats.items(), key=lambda item: -item[1][1] ):
+            report[ name ] = {
+                'calls'     : count,
+                'total'     : total,
+                'average'   : total / count,
+                'max'       : slowest,
+                'histogram' : { str( 1 << bucket ): hits for bucket, hits in enumerate( buckets ) if hits },
+            }
+        return report
+
+    def Summary( self, limit=15 ):
+        report = self.Report()
+        lines = [ f"API calls: {sum( stat['calls'] for stat in report.values() )} in {sum( stat['total'] for stat in report.values() ):.3f}s" ]
+        for name, stat in list( report.items() )[:limit]:
+            lines.append( f"  {name:<40} {stat['calls']:>8} calls {stat['total']:>9.3f}s total {stat['average'] * 1000:>8.3f}ms avg {stat['max'] * 1000:>8.3f}ms max" )
+        return '\n'.join( lines )
+
+    def WriteTrace( self, path ):
+        """
+        Writes the recorded calls in the Chrome trace event format.
+        """
+        events = [
+            {
+                'name'  : name,
+                'cat'   : name.split( '.' )[0],
+                'ph'    : 'X',
+                'ts'    : ( started - self.start ) * 1000000,
+                'dur'   : elapsed * 1000000,
+                'pid'   : os.getpid(),
+                'tid'   : thread,
+            }
+            for name, started, elapsed, thread in self.events
+        ]
+        with open( path, 'w', encoding='utf-8' ) as file:
+            json.dump( { 'traceEvents': events, 'displayTimeUnit': 'ms' }, file )
+        return path
+
+class ApiProxy:
+    """
+    Stands in for a Resolve / UIManager object, timing each method call through its
+    ApiProfiler. Attribute and item access are passed through untimed.
+    """
+    __slots__ = ( '_target', '_name', '_owner', '_children' )
+
+    # Plain values the API returns, which are never wrapped
+    _values = ( str, int, float, bool, bytes, dict, list, tuple )
+
+    def __init__( self, target, name, owner, children=True ):
+        object.__setattr__( self, '_target', target )
+        object.__setattr__( self, '_name', name )
+        object.__setattr__( self, '_owner', owner )
+        object.__setattr__( self, '_children', children )
+
+    @staticmethod
+    def Kind( attribute, result ):
+        # GetCurrentTimeline -> Timeline, GetTimelineByIndex -> Timeline, ...
+        return re.sub( r'^(Get)?(Current)?|By\w+$', '', attribute ) or type( result ).__name__
+
+    def __getattr__( self, attribute ):
+        value = getattr( self._target, attribute )
+        if not callable( value ):
+            return value
+
+        name = f"{self._name}.{attribute}"
+        profiler = self._owner
+        children = self._children
+
+        def _call( *args, **kwargs ):
+            args = [ arg._target if isinstance( arg, ApiProxy ) else arg for arg in args ]
+            started = time.perf_counter()
+            try:
+                return value( *args, **kwargs )
+            finally:
+                profiler.Record( name, started, time.perf_counter() - started )
+
+        if not children:
+            return _call
+
+        def _wrapped( *args, **kwargs ):
+            result = _call( *args, **kwargs )
+            if result is None or isinstance( result, ApiProxy._values ):
+                return result
+            return profiler.Wrap( result, ApiProxy.Kind( attribute, result ) )
+        return _wrapped
+
+    def __setattr__( self, attribute, value ):
+        setattr( self._target, attribute, value )
+
+    def __getitem__( self, key ):
+        return self._target[ key ]
+
+    def __eq__( self, other ):
+        return self._target == ( other._target if isinstance( other, ApiProxy ) else other )
+
+    def __hash__( self ):
+        return hash( self._target )
+
+    def __repr__( self ):
+        return f"{type( self ).__name__}({self._name}, {self._target!r})"
+
+class BridgeScheduler:
+    """
+    Sits between MarkerMan and the scripting API. Read calls are answered from a cache
+    when the same call was made since the last write, consecutive SetRenderSettings
+    calls are merged and sent as one just before the next call, calls are spaced to at
+    most rateLimit per second, and the calls in retry that come back None / False (as
+    they do when Resolve is busy) are tried again with exponentially growing pauses.
+    AddMarker and DeleteMarkerAtFrame aren't retried: they also return False when there
+    already is a marker at the frame / there is none, and retrying those would only add
+    the pauses before MarkerTransaction sees the failure and rolls back.
+    """
+    reads = frozenset( (
+        'GetProjectManager', 'GetCurrentProject', 'GetName', 'GetUniqueId', 'GetSetting', 'GetCurrentTimeline',
+        'GetTimelineCount', 'GetTimelineByIndex', 'GetStartFrame', 'GetEndFrame', 'GetMarkers', 'GetRenderJobList',
+    ) )
+    retry = frozenset( (
+        'GetProjectManager', 'GetCurrentProject', 'GetCurrentTimeline', 'GetSetting', 'GetMarkers', 'GetRenderJobList',
+        'SetRenderSettings', 'AddRenderJob', 'SetCurrentTimeline', 'StartRendering',
+    ) )
+
+    def __init__( self, rateLimit=None, retries=3, backoff=0.05 ):
+        self.rateLimit = rateLimit
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = {}
+        self.pending = None
+        self.next = 0.0
+        self.first = None
+        self.last = None
+        self.stats = { 'requested': 0, 'calls': 0, 'deduped': 0, 'coalesced': 0, 'retries': 0, 'failed': 0 }
+
+    def Wrap( self, target, name ):
+        if target is None or target is False or isinstance( target, ScheduledProxy ):
+            return target
+        return ScheduledProxy( target, name, self )
+
+    def Call( self, target, name, method, args, kwargs ):
+        self.stats['requested'] += 1
+
+        # Render settings are collected until something else is called
+        if name == 'SetRenderSettings' and len( args ) == 1 and not kwargs:
+            if self.pending and self.pending[0] is not target:
+                self.Flush()
+            if self.pending:
+                self.stats['coalesced'] += 1
+            else:
+                self.pending = ( target, method, {} )
+            self.pending[2].update( args[0] )
+            return True
+
+        # A call made with the wrong render settings would be worse than a failed one
+        if self.pending and not self.Flush():
+            self.stats['failed'] += 1
+            return None
+
+        if name not in self.reads:
+            self.cache.clear()
+            return self.Issue( name, method, args, kwargs )
+
+        # The target is kept with the result so its id can't be reused while cached
+        key = ( id( target ), name, repr( args ), repr( kwargs ) )
+        if key in self.cache:
+            self.stats['deduped'] += 1
+            result = self.cache[ key ][1]
+            return type( result )( result ) if isinstance( result, ( dict, list ) ) else result
+
+        result = self.Issue( name, method, args, kwargs )
+        if result is not None and result is not False:
+            self.cache[ key ] = ( target, result )
+            return type( result )( result ) if isinstance( result, ( dict, list ) ) else result
+        return result
+
+    def Issue( self, name, method, args, kwargs ):
+        attempts = self.retries + 1 if name in self.retry else 1
+        for attempt in range( attempts ):
+            if attempt:
+                self.stats['retries'] += 1
+                time.sleep( self.backoff * 2 ** ( attempt - 1 ) )
+            self.Wait()
+            result = method( *args, **kwargs )
+            self.stats['calls'] += 1
+            self.last = time.perf_counter()
+            if result is not None and result is not False:
+                return result
+        if name in self.retry:
+            self.stats['failed'] += 1
+        return result
+
+    def Wait( self ):
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        if self.rateLimit:
+            if now < self.next:
+                time.sleep( self.next - now )
+                now = self.next
+            self.next = now + 1.0 / self.rateLimit
+
+    def Flush( self ):
+        if not self.pending:
+            return True
+        target, method, settings = self.pending
+        self.pending = None
+        result = self.Issue( 'SetRenderSettings', method, [ settings ], {} )
+        return result is not None and result is not False
+
+    def Report( self ):
+        self.Flush()
+        elapsed = ( self.last - self.first ) if self.first is not None and self.last is not None else 0.0
+        return dict( self.stats, elapsed=elapsed, callsPerSecond=self.stats['calls'] / elapsed if elapsed > 0 else 0.0 )
+
+    def Summary( self ):
+        report = self.Report()
+        return ( f"Bridge calls: {report['calls']} made for {report['requested']} requested "
+                 f"({report['deduped']} answered from cache, {report['coalesced']} settings merged), "
+                 f"{report['retries']} retries, {report['failed']} failed, {report['callsPerSecond']:.0f} calls/s" )
+
+class ScheduledProxy( ApiProxy ):
+    """
+    ApiProxy sending every method call through its BridgeScheduler.
+    """
+    __slots__ = ()
+
+    def __getattr__( self, attribute ):
+        value = getattr( self._target, attribute )
+        if not callable( value ):
+            return value
+
+        target = self._target
+        scheduler = self._owner
+
+        def _call( *args, **kwargs ):
+            args = [ arg._target if isinstance( arg, ScheduledProxy ) else arg for arg in args ]
+            result = scheduler.Call( target, attribute, value, args, kwargs )
+            if result is None or isinstance( result, ApiProxy._values ):
+                return result
+            return scheduler.Wrap( result, ApiProxy.Kind( attribute, result ) )
+        return _call
 
 class MarkerManager:
-    def __init__(self):
-        self.bmd = GetBMD()
-        self.resolve = app.GetResolve()
-        self.fusion = app
+    def __init__(self, resolve=None, headless=False, profiler=None, cache=True, scheduler=None):
+        self.headless = headless
+        self.bmd = False
+        self.fusion = False
+
+        # A resolve handle can be injected (e.g. a fake Resolve for tests and benchmarks),
+        # otherwise use the one provided by Resolve / fuscript.
+        if resolve is None:
+            self.bmd = GetBMD()
+            self.fusion = GetFusionApp()
+            if self.fusion:
+                resolve = self.fusion.GetResolve()
+            else:
+                resolve = self.bmd.scriptapp('Resolve')
+
+        # Opt-in API instrumentation, see ApiProfiler
+        self.profiler = profiler
+        if self.profiler:
+            resolve = self.profiler.Wrap( resolve, 'Resolve' )
+
+        # Opt-in call scheduling, see BridgeScheduler. The profiler sits behind it, so it
+        # sees the calls that actually cross the bridge.
+        self.scheduler = scheduler
+        if self.scheduler:
+            resolve = self.scheduler.Wrap( resolve, 'Resolve' )
+
+        self.resolve = resolve
         self.project = self.resolve.GetProjectManager().GetCurrentProject()
         self.timeline = self.project.GetCurrentTimeline()
-        self.clips = []
+        self.context = TimelineContext( self.project, self.timeline )
+        self.clips = ClipTable( self )
         self.markers = {}
-        self.screen = self.GetScreenSize()
+        self.markerIndex = False
+        self.markerSelection = ( False, None, None )
+        self.snapshots = {}
+        self.screen = False
         self.version = 0.11
         self.markerProcessingFunction = False
+        self.markingMode = 'dual'
+        self.preferences = Preferences()
         self.renderLocation = False
+        self.renderPreset = False
+        self.renderMonitor = False
+        # Marker snapshots for MarkClipsIncrementally are kept on disk between runs
+        self.snapshotCache = FileCache( os.path.join( GetCacheDirectory(), 'snapshots' ), maxBytes=128 * 1024 * 1024 ) if cache else False
+        self.ui = False
+        self.disp = False
+
+        if self.headless:
+            return
+
+        self.screen = self.GetScreenSize()
 
         # Displays UI Prompt in Resolve
         # Seems to work externally even though posts say it's not meant to.
         try:
             self.ui = self.fusion.UIManager
             self.disp = self.bmd.UIDispatcher(self.ui)
+            if self.profiler:
+                self.ui = self.profiler.Wrap( self.ui, 'UIManager', children=False )
+                self.disp = self.profiler.Wrap( self.disp, 'UIDispatcher', children=False )
             self.DialogSelectMarkerColor()
         except:
             self.ui = False
             self.disp = False
+        log.Flush()
 
-    def GetScreenSize(self):
+    def Run( self, colors, mode='dual', renderLocation=None, queue=True, renderPreset=False, incremental=False, render=False, renderReport=None, duplicates='skip', resume=False ):
+        """
+        Headless equivalent of the dialog flow, never builds any UIManager windows.
+        Selects markers by colour, marks clips using the given mode ('dual', 'duration'
+        or the name of a MarkClipsUsing* method) and adds them to the render queue
+        if a render location is given, optionally using a named render preset.
+        When incremental, only clips that changed since the previous run on the same
+        timeline are listed or queued. When render is set the queued jobs are rendered
+        and followed until they finish, optionally writing a JSON report. duplicates
+        and resume are passed on to AddClipsToRenderQueue.
+        """
+        function = self.GetMarkingFunction( mode )
+
+        self.clips = ClipTable( self )
+        self.context.Invalidate()
+        self.markerIndex = False
+        self.MarkersByColor( colors )
+
+        # Only clips that changed since the last run on this timeline are passed on
+        clips = None
+        if incremental:
+            changes = self.MarkClipsIncrementally( mode )
+            clips = changes.Changed()
+            log.Info( f"Clips changed since last run: {len( changes.added )} added, {len( changes.removed )} removed, {len( changes.modified )} modified" )
+        else:
+            function()
+
+        validation = self.ValidateClips()
+        if validation:
+            log.Warning( f"Check before queueing: {validation.Summary()}" )
+            lines = validation.Describe( self.clips, self.FramesToDuration )
+            for line in lines[:20]:
+                log.Warning( f"  {line}" )
+            if len( lines ) > 20:
+                log.Warning( f"  ...and {len( lines ) - 20} more" )
+
+        if queue and renderLocation:
+            self.renderLocation = os.path.normpath( renderLocation )
+            self.renderPreset = renderPreset
+            report = self.AddClipsToRenderQueue( clips, duplicates, resume=resume )
+            if render and report['jobs']:
+                self.MonitorRenders( report['jobs'] ).Wait()
+                self.ReportRenders( renderReport )
+            elif render:
+                log.Info( 'No new render jobs to render.' )
+        else:
+            self.ListClips( clips )
+
+        log.Flush()
+        return self
+
+    def SetTimeline( self, timeline=None, project=None ):
+        if project is not None:
+            self.project = project
+            if timeline is None:
+                timeline = self.project.GetCurrentTimeline()
+        if timeline is not None:
+            self.timeline = timeline
+        self.context.Invalidate( self.project, self.timeline )
+        self.markerIndex = False
+        return self
+
+    def GetMarkingFunction( self, mode ):
+        name = MARKING_MODES.get( mode, mode )
+        if name not in MARKING_MODES.values():
+            raise ValueError( f"Unknown marking mode '{mode}', expected one of: {', '.join( MARKING_MODES )}" )
+        return functools.partial( self.MarkClipsInBatch, name )
+
+    def GetScreenSize( self, maxAge=24 * 3600 ):
+        # Starting Tk is slow, so the screen size is remembered between launches. It's
+        # measured again once it's maxAge seconds old, in case the display has changed.
+        screen = self.preferences.Get( 'screen' )
+        if screen and 0 <= time.time() - screen.get( 'measured', 0 ) < maxAge:
+            return screen
+
+        import tkinter as tk
         root = tk.Tk()
         screen_width = root.winfo_screenwidth()
         screen_height = root.winfo_screenheight()
         scaling_factor = root.tk.call('tk', 'scaling')
-        root.quit()
-        return {
+        root.destroy()
+        screen = {
             'width': screen_width,
             'height': screen_height,
             'scaling': scaling_factor,
             'midX': ( screen_width / scaling_factor ) / 2,
             'midY': ( screen_height / scaling_factor ) / 2,
+            'measured': time.time(),
         }
+        self.preferences.Set( 'screen', screen ).Save()
+        return screen
    
     def GetMarkerColors(self):
         return [
@@ -82,7 +1920,7 @@ class MarkerManager:
    
     def DialogSelectMarkerColor(self):
         if self.ui is False or self.disp is False:
-            print('Unable to draw window, no UI.')
+            log.Warning('Unable to draw window, no UI.')
             return
 
         dialogWidth = 650
@@ -92,6 +1930,7 @@ class MarkerManager:
         markerColorsRows = []
         count = 1
         allColors = self.GetMarkerColors()
+        lastColors = self.preferences.Get( 'colors', [] )
         for color in allColors:
             enabled = not color.startswith('none')
             markerColors.append(
@@ -99,6 +1938,7 @@ class MarkerManager:
                     "ID": f"MarkerColor_{color}",
                     "Text": color if enabled else '-',
                     "Enabled": enabled,
+                    "Checked": enabled and color in lastColors,
                     "Weight": 1
                     })
             )
@@ -145,7 +1985,8 @@ class MarkerManager:
             for color in self.GetMarkerColors():
                 if itm[f"MarkerColor_{color}"].Checked:
                     checked.append( color )
-            self.markers = self.GetMarkersByColor( checked )
+            self.MarkersByColor( checked )
+            self.preferences.Set( 'colors', checked ).Save()
 
             dlg.Hide()
            
@@ -164,31 +2005,40 @@ class MarkerManager:
    
     def DialogMarkClips(self):
         if self.ui is False or self.disp is False:
-            print('Unable to draw window, no UI.')
+            log.Warning('Unable to draw window, no UI.')
             return
        
         dialogWidth = 650
-        dialogHeight = 250
+        dialogHeight = 280
 
         markerCount = len( self.markers )
+        changedOnly = self.preferences.Get( 'changedOnly', False )
 
         options = {
             "Mark Clips using Multiple Markers" : {
                 "description"   : "Markers WITH NAMES will be treated as IN points, the next marker will be treated the OUT point. If the next marker also has a name, it will be an IN point for the next clip.",
                 "enabled"       : True,
-                "function"      : self.MarkClipsUsingDualMarkers
+                "mode"          : 'dual',
+                "function"      : functools.partial( self.MarkClipsInSteps, 'dual' )
             },
             "Mark Clips using Marker Duration"  : {
                 "description"   : "Marker durations will be used to denote IN and OUT point of clips.",
                 "enabled"       : True,
-                "function"      : self.MarkClipsUsingMarkerDuration
+                "mode"          : 'duration',
+                "function"      : functools.partial( self.MarkClipsInSteps, 'duration' )
             },
         }
 
-        firstDescription = ''
-        for key, option in options.items():
-            firstDescription = option['description']
-            break
+        # Start with the option used last time
+        enabledOptions = [ key for key, option in options.items() if option['enabled'] ]
+        lastMode = self.preferences.Get( 'mode', 'dual' )
+        selectedOption = enabledOptions[0]
+        for key in enabledOptions:
+            if options[ key ]['mode'] == lastMode:
+                selectedOption = key
+        firstDescription = options[ selectedOption ]['description']
+        self.markingMode = options[ selectedOption ]['mode']
+        self.markerProcessingFunction = options[ selectedOption ]['function']
        
         dlg = self.disp.AddWindow(
             {
@@ -203,6 +2053,7 @@ class MarkerManager:
                     self.ui.Label({ "ID": "MyLabel", "Text": f"Found {markerCount} markers, how should they be used?", "Weight": 0 }),
                     self.ui.ComboBox({ "ID": "MySelector", "Height": 20, "Weight": 0 }),
                     self.ui.TextEdit({ "ID": "Description", "Text": firstDescription, "ReadOnly": True }),
+                    self.ui.CheckBox({ "ID": "ChangedOnly", "Text": "Only show and queue clips that changed since the last run on this timeline", "Checked": changedOnly, "Weight": 0 }),
                     self.ui.VGap(4, 1),
                     self.ui.Button({ "ID": "AcceptButton", "Text": "Let's Go", "Weight": 0 }),
                 ]),
@@ -222,16 +2073,39 @@ class MarkerManager:
         def _func(ev):
             selected = itm['MySelector'].CurrentText
             itm['Description'].Text = options[ selected ]['description']
+            self.markingMode = options[ selected ]['mode']
             self.markerProcessingFunction = options[ selected ]['function']
         dlg.On.MySelector.CurrentIndexChanged = _func
+        itm['MySelector'].CurrentIndex = enabledOptions.index( selectedOption )
  
         def _func(ev):
             dlg.Hide()
-
-            if callable( self.markerProcessingFunction ):
-                self.markerProcessingFunction()
-
-            clipNo = len(self.clips)
+            changedOnly = itm['ChangedOnly'].Checked
+            self.preferences.Set( 'mode', self.markingMode ).Set( 'changedOnly', changedOnly ).Save()
+
+            # Marking runs in steps between UI events, so Resolve stays responsive and it can be cancelled
+            changes = None
+            if changedOnly:
+                task = self.DialogProgress( "Marking clips", ChunkedTask( self.MarkChangedClipsInSteps( self.markingMode ) ) )
+                if task.cancelled:
+                    self.clips = ClipTable( self )
+                    self.disp.ExitLoop()
+                    return
+                changes = task.result
+            elif callable( self.markerProcessingFunction ):
+                task = self.DialogProgress( "Marking clips", ChunkedTask( self.markerProcessingFunction() ) )
+                if task.cancelled:
+                    self.clips = ClipTable( self )
+                    self.disp.ExitLoop()
+                    return
+
+            # Only the changed clips are displayed and queued
+            clips = self.clips
+            if changes is not None:
+                clips = self.clips.Take( [ clip.position for clip in changes.Changed() ] )
+
+            clipNo = len( clips )
+            validation = self.ValidateClips( clips )
             headers = [
                 { 'title': "Index", 'width': 75 },
                 { 'title': "Name", 'width': 350 },
@@ -243,19 +2117,7 @@ class MarkerManager:
                 { 'title': "Notes", 'width': 150 },
                 { 'title': "", 'width': 150 },
             ]
-            rows = []
-
-            for clip in self.clips:
-                rows.append([
-                    clip['index'],
-                    clip['name'],
-                    clip['duration'],
-                    clip['filename'],
-                    clip['color'],
-                    self.FramesToDuration( clip['inPoint'] ),
-                    self.FramesToDuration( clip['outPoint'] ),
-                    clip['note'],
-                ])
+            rows = self.GetClipTreeStore( clips )
             
             def _requestRenderLocation(ev):
                 self.AskForRenderLocation()
@@ -263,8 +2125,13 @@ class MarkerManager:
             def _neverMind(ev):
                 self.disp.ExitLoop()
 
+            def _showProblems(ev):
+                self.DialogTextDisplay( f"Problems: {validation.Summary()}", '\n'.join( validation.Describe( clips, self.FramesToDuration ) ) )
+
             def _addToRenderQueue(ev):
-                self.AddClipsToRenderQueue()
+                if self.renderLocation == False:
+                    self.AskForRenderLocation()
+                self.DialogProgress( "Adding clips to the render queue", ChunkedTask( self.QueueClipsInSteps( clips ) ), 'jobs' )
                 self.disp.ExitLoop()
 
             buttons = [
@@ -278,6 +2145,9 @@ class MarkerManager:
                 },{
                     'events'    : { },
                     'object'    : self.ui.HGap(4,1)
+                },{
+                    'events'    : { 'Clicked': _showProblems },
+                    'object'    : self.ui.Button({ "ID": "Button_Problems", "Text": f"{len( validation )} Problems", "Weight": 0, "Enabled": len( validation ) > 0 })
                 },{
                     'events'    : { 'Clicked': _neverMind },
                     'object'    : self.ui.Button({ "ID": "Button_NeverMind", "Text": 'Nevermind', "Weight": 0 })
@@ -287,7 +2157,12 @@ class MarkerManager:
                 }
             ]
            
-            self.DialogTreeDisplay( f"Marked {clipNo} clips based on marker positions.", headers, rows, buttons )
+            title = f"Marked {clipNo} clips based on marker positions."
+            if changes is not None:
+                title = f"{len( changes.added )} clips added, {len( changes.modified )} modified and {len( changes.removed )} removed since the last run."
+            if validation:
+                title = f"{title} Check before queueing: {validation.Summary()}."
+            self.DialogTreeDisplay( title, headers, rows, buttons )
 
             self.disp.ExitLoop()
 
@@ -297,18 +2172,59 @@ class MarkerManager:
         self.disp.RunLoop()
         dlg.Hide()
 
-    def DialogTreeDisplay( self, title, headers, rows, buttons ):
+    def GetClipTreeStore( self, clips ):
+        return TreeStore(
+            len( clips ),
+            [
+                lambda position: clips.Get( position, 'index' ),
+                lambda position: clips.Get( position, 'name' ),
+                lambda position: clips.Get( position, 'duration' ),
+                lambda position: clips.Get( position, 'filename' ),
+                lambda position: clips.Get( position, 'color' ),
+                lambda position: self.FramesToDuration( clips.inPoints[ position ] ),
+                lambda position: self.FramesToDuration( clips.outPoints[ position ] ),
+                lambda position: clips.Get( position, 'note' ),
+            ],
+            [
+                lambda position: clips.indexes[ position ],
+                lambda position: clips.Get( position, 'name' ).lower(),
+                lambda position: clips.frames[ position ],
+                lambda position: clips.Get( position, 'filename' ),
+                lambda position: clips.colors[ position ],
+                lambda position: clips.inPoints[ position ],
+                lambda position: clips.outPoints[ position ],
+                lambda position: clips.Get( position, 'note' ).lower(),
+            ],
+            # Filter on name, filename, colour and notes
+            [ 1, 3, 4, 7 ]
+        )
+
+    def DialogTreeDisplay( self, title, headers, rows, buttons, pageSize=250 ):
         if self.ui is False or self.disp is False:
-            print('Unable to draw window, no UI.')
+            log.Warning('Unable to draw window, no UI.')
             return
        
         dialogWidth = 750
         dialogHeight = 450
 
+        # Rows can be given as lists of cells or as a TreeStore
+        store = rows if isinstance( rows, TreeStore ) else TreeStore.FromRows( rows )
+        sortable = [ h['title'] for h in headers[ :len( store.cells ) ] ]
+
         controls = [
             self.ui.Label({ "ID": "MyTitle", "Text": title, "Weight": 0.25, "Weight": 0  }),
             self.ui.VGap(4),
+            self.ui.HGroup({ "Spacing": 10, "Weight": 0 }, [
+                self.ui.LineEdit({ "ID": "Filter", "PlaceholderText": "Filter", "Weight": 1 }),
+                self.ui.ComboBox({ "ID": "SortBy", "Weight": 0 }),
+                self.ui.CheckBox({ "ID": "SortDescending", "Text": "Descending", "Weight": 0 }),
+            ]),
             self.ui.Tree({ "ID": "MyTree", "SortingEnabled": False }),
+            self.ui.HGroup({ "Spacing": 10, "Weight": 0 }, [
+                self.ui.Button({ "ID": "PreviousPage", "Text": "<", "Weight": 0 }),
+                self.ui.Label({ "ID": "PageLabel", "Text": "", "Weight": 1, "Alignment": { "AlignHCenter": True } }),
+                self.ui.Button({ "ID": "NextPage", "Text": ">", "Weight": 0 }),
+            ]),
             self.ui.VGap(4),
         ]
 
@@ -347,15 +2263,57 @@ class MarkerManager:
             itm['MyTree'].ColumnWidth[index] = h['width']
             index = index + 1
 
-        for columns in rows:
-            column = itm['MyTree'].NewItem()
+        for title in sortable:
+            itm['SortBy'].AddItem( f"Sort by {title}" )
 
-            index = 0
-            for c in columns:
-                column.Text[index] = str(c)
-                index = index + 1
+        # Only the rows on the current page are added to the tree
+        page = { 'number': 0 }
+
+        def _showPage():
+            pageCount = store.PageCount( pageSize )
+            page['number'] = min( max( page['number'], 0 ), pageCount - 1 )
+
+            itm['MyTree'].UpdatesEnabled = False
+            itm['MyTree'].Clear()
+            for columns in store.Page( page['number'], pageSize ):
+                column = itm['MyTree'].NewItem()
+
+                index = 0
+                for c in columns:
+                    column.Text[index] = str(c)
+                    index = index + 1
+
+                itm['MyTree'].AddTopLevelItem(column)
+            itm['MyTree'].UpdatesEnabled = True
+
+            itm['PageLabel'].Text = f"Page {page['number'] + 1} of {pageCount} ({len( store.view )} of {store.count} rows)"
+            itm['PreviousPage'].Enabled = page['number'] > 0
+            itm['NextPage'].Enabled = page['number'] < pageCount - 1
 
-            itm['MyTree'].AddTopLevelItem(column)
+        def _previousPage(ev):
+            page['number'] = page['number'] - 1
+            _showPage()
+        dlg.On.PreviousPage.Clicked = _previousPage
+
+        def _nextPage(ev):
+            page['number'] = page['number'] + 1
+            _showPage()
+        dlg.On.NextPage.Clicked = _nextPage
+
+        def _filter(ev):
+            store.Filter( itm['Filter'].Text )
+            page['number'] = 0
+            _showPage()
+        dlg.On.Filter.TextChanged = _filter
+
+        def _sort(ev):
+            store.Sort( itm['SortBy'].CurrentIndex, itm['SortDescending'].Checked )
+            page['number'] = 0
+            _showPage()
+        dlg.On.SortBy.CurrentIndexChanged = _sort
+        dlg.On.SortDescending.Clicked = _sort
+
+        _showPage()
 
         # Handle button presses
         for button in buttons:
@@ -363,7 +2321,7 @@ class MarkerManager:
                 for event, eventFunc in button['events'].items():
                     setattr( dlg.On[ button['object']['ID'] ], event, eventFunc)
             except:
-                print('Error with button.')
+                log.Error('Error with button.')
        
         # The window was closed
         def _closeButton(ev):
@@ -378,9 +2336,66 @@ class MarkerManager:
         self.disp.RunLoop()
         dlg.Hide()
 
+    def DialogProgress( self, title, task, unit='clips' ):
+        """
+        Runs a ChunkedTask from a UI timer, a slice at a time, showing a progress bar,
+        rate and time left, with a button to cancel it between two steps.
+        """
+        if self.ui is False or self.disp is False:
+            task.Run()
+            return task
+
+        dialogWidth = 450
+        dialogHeight = 150
+
+        dlg = self.disp.AddWindow(
+            {
+                "WindowTitle": "MarkerManager",
+                "ID": "DialogProgress",
+                "Geometry": [ self.screen['midX'], self.screen['midY'], dialogWidth, dialogHeight ],
+            },
+            [
+                self.ui.VGroup({ "Spacing": 10 },
+                [
+                    self.ui.Label({ "ID": "MyTitle", "Text": title, "Weight": 0 }),
+                    self.ui.Label({ "ID": "ProgressBar", "Text": "", "Weight": 0 }),
+                    self.ui.Label({ "ID": "ProgressStatus", "Text": "Starting...", "Weight": 0 }),
+                    self.ui.Button({ "ID": "CancelButton", "Text": 'Cancel', "Weight": 0 }),
+                ]),
+            ])
+
+        itm = dlg.GetItems()
+        timer = self.ui.Timer({ "ID": "ProgressTimer", "Interval": 0 })
+
+        def _tick(ev):
+            # About 50ms of work per tick leaves the event loop free to redraw and handle Cancel
+            if task.Step( 0.05 ):
+                fraction, rate, remaining = task.Progress()
+                filled = int( fraction * 30 )
+                itm['ProgressBar'].Text = f"{'█' * filled}{'░' * ( 30 - filled )} {fraction:.0%}"
+                left = f"{remaining:.0f}s left" if remaining is not None else ''
+                itm['ProgressStatus'].Text = f"{task.done} of {task.total} {unit}, {rate:.0f} {unit}/s {left}"
+            else:
+                timer.Stop()
+                log.Flush()
+                self.disp.ExitLoop()
+        self.disp.On.ProgressTimer.Timeout = _tick
+
+        def _cancel(ev):
+            itm['ProgressStatus'].Text = "Cancelling..."
+            task.Cancel()
+        dlg.On.CancelButton.Clicked = _cancel
+        dlg.On.DialogProgress.Close = _cancel
+
+        dlg.Show()
+        timer.Start()
+        self.disp.RunLoop()
+        dlg.Hide()
+        return task
+
     def DialogTextDisplay( self, title, text ):
         if self.ui is False or self.disp is False:
-            print('Unable to draw window, no UI.')
+            log.Warning('Unable to draw window, no UI.')
             return
        
         dialogWidth = 750
@@ -421,7 +2436,7 @@ class MarkerManager:
 
     def DialogMessage( self, text ):
         if self.ui is False or self.disp is False:
-            print('Unable to draw window, no UI.')
+            log.Warning('Unable to draw window, no UI.')
             return
        
         dialogWidth = 450
@@ -458,133 +2473,452 @@ class MarkerManager:
         dlg.Hide()
 
     def AddMarker(self, frame, color, name, comment, duration=1, custom_data=None):
+        self.markerIndex = False
         return self.timeline.AddMarker(frame, color, name, comment, duration, custom_data)
 
     def DeleteMarker(self, frame):
+        self.markerIndex = False
         return self.timeline.DeleteMarkerAtFrame(frame)
 
     def GetMarkers(self):
         return self.timeline.GetMarkers()
 
+    def GetMarkerIndex( self ):
+        # Built once from GetMarkers(), dropped whenever markers are added or deleted
+        if self.markerIndex is False:
+            self.markerIndex = MarkerIndex( self.GetMarkers() )
+        return self.markerIndex
+
     def GetMarkersByColor(self, color):
-        if type(color) != list:
-            color = [ color ]
-        markers = self.GetMarkers()
-        return {frame: details for frame, details in markers.items() if details['color'] in color}
+        return self.GetMarkerIndex().Select( color )
+
+    def GetMarkersBetween( self, start, end, color=None ):
+        return self.GetMarkerIndex().Select( color, start, end )
    
     def Markers( self ):
-        self.markers = self.GetMarkers()
-        return self
+        return self.MarkersByColor( None )
    
     def MarkersByColor( self, color ):
-        self.markers = self.GetMarkersByColor( color )
+        index = self.GetMarkerIndex()
+        positions = index.Positions( color )
+        self.markers = { index.frames[ position ]: index.markers[ position ] for position in positions }
+        # Remembered so the selection can be marked straight from the index, see GetMarkingEngine
+        self.markerSelection = ( index, positions, self.markers )
         return self
 
+    def ImportMarkers( self, path, format=None, progress=None ):
+        """
+        Adds the markers from a CSV, JSON Lines or EDL marker list to the timeline.
+        progress is called with the number of markers read so far, once per chunk.
+        """
+        markerFile = MarkerFile( path, format, self.context.frameRate, self.context.startFrame, dropFrame=self.context.dropFrame )
+        self.markerIndex = False
+
+        added = 0
+        failed = 0
+        for frame, marker in markerFile.Read( progress ):
+            if self.timeline.AddMarker( frame, marker['color'], marker['name'], marker['note'], marker['duration'], marker['customData'] ):
+                added = added + 1
+            else:
+                failed = failed + 1
+
+        log.Info( f"Imported {added} markers from {path} ({failed} failed)" )
+        return added
+
+    def ExportMarkers( self, path, format=None, color=None, progress=None ):
+        """
+        Writes the timeline's markers, optionally only those of the given colour(s), to a
+        CSV, JSON Lines or EDL marker list. progress is called like ImportMarkers.
+        """
+        markerFile = MarkerFile( path, format, self.context.frameRate, self.context.startFrame, dropFrame=self.context.dropFrame )
+        index = self.GetMarkerIndex()
+        markers = ( ( index.frames[ position ], index.markers[ position ] ) for position in index.Positions( color ) )
+
+        count = markerFile.Write( markers, progress, self.timeline.GetName() )
+        log.Info( f"Exported {count} markers to {path}" )
+        return count
+
     def EditMarkers(self, markers, color=None, name=None, note=None, duration=None, custom_data=None):
+        current = self.GetMarkers()
+        desired = dict( current )
         for frame, marker in markers.items():
-            if self.timeline.DeleteMarkerAtFrame(frame):
-                self.AddMarker(
-                    frame,
-                    color if color else marker['color'],
-                    name if name else marker['name'],
-                    note if note else marker['note'],
-                    duration if duration else marker['duration'],
-                    custom_data if custom_data else marker['customData']
-                )
+            if frame in current:
+                desired[ frame ] = {
+                    'color'         : color if color else marker['color'],
+                    'name'          : name if name else marker['name'],
+                    'note'          : note if note else marker['note'],
+                    'duration'      : duration if duration else marker['duration'],
+                    'customData'    : custom_data if custom_data else marker['customData'],
+                }
+        return self.SetMarkers( desired, current )
 
     def DeleteAllMarkers(self):
-        markers = self.GetMarkers()
-        for frame in markers.keys():
-            self.DeleteMarker(frame)
+        return self.SetMarkers( {} )
+
+    def SetMarkers( self, desired, current=None ):
+        """
+        Replaces the timeline's markers with the desired frame: marker dict in one
+        MarkerTransaction, returns the transaction so it can be undone.
+        """
+        self.markerIndex = False
+        transaction = MarkerTransaction( self.timeline, current )
+        stats = transaction.Apply( desired )
+        log.Info( f"Updated {stats['markers']} markers with {stats['calls']} calls in {stats['elapsed']:.3f}s ({stats['markersPerSecond']:.0f} markers/s)" )
+        return transaction
 
     def GetSettings(self):
         return self.project.GetSetting()
    
     def CalculateAspectRatio(self, height, width):
-        # Convert inputs to integers if they're not already
-        height = int(height)
-        width = int(width)
-
-        # Import the gcd function from math module
-        from math import gcd
-
-        # Calculate the Greatest Common Divisor of height and width
-        gcd_val = gcd(height, width)
-
-        # Divide height and width by the gcd to get simplified ratio
-        ratio_height = height // gcd_val
-        ratio_width = width // gcd_val
-
-        # Return the ratio in the required format
-        return f"{ratio_width}_{ratio_height}"
+        return CalculateAspectRatio( height, width )
    
     def MarkClip( self, inPoint, outPoint, marker, index ):
+        # Duration and filename are formatted by the clip table when they're needed
+        self.clips.Add( inPoint, outPoint, marker, index )
 
-        # Duration in frames
-        frames = int( outPoint ) - int( inPoint )
+    def ValidateClips( self, clips=None ):
+        if clips is None:
+            clips = self.clips
+        return ClipValidation( clips.inPoints, clips.outPoints, self.context.startFrame, self.context.endFrame )
 
-        # Duration as timecode
-        duration = self.CalculateDuration( inPoint, outPoint )
+    def ListClips( self, clips=None ):
+        if clips is None:
+            clips = self.clips
 
-        # Filename
-        fileName = self.SanitizeFilename( marker['name'] )
-        fileName = f"{index:02d}_{fileName}"
+        total_clips = len( clips )
+        log.Info( f"Clips marked: {total_clips}, {self.FramesToDuration( sum( clip['frames'] for clip in clips ) )} in total" )
 
-        # print( f"Marked clip '{fileName}' with duration {duration}")
-       
-        clip = {
-            'index'     : f"{index:002d}",
-            'inPoint'   : inPoint,
-            'outPoint'  : outPoint,
-            'filename'  : fileName,
-            'name'      : marker['name'],
-            'note'      : marker['note'],
-            'color'     : marker['color'],
-            'frames'    : frames,
-            'duration'  : duration,
-        }
-
-        self.clips.append(clip)
+        if log.Enabled( 'DEBUG' ):
+            for clip in clips:
+                log.Debug( 'Clip', **clip.AsDict() )
 
-    def ListClips( self ):
-        total_clips = len( self.clips )
-        print( f"Clips marked: {total_clips}" )
+    def AddClipsToRenderQueue( self, clips=None, duplicates='skip', planned=False, resume=False ):
+        """
+        Queues a render job per clip. Clips already in the render queue for this timeline
+        (same in / out points, render location and filename) are skipped, or replaced
+        when duplicates is 'replace'. Use 'allow' to always queue them again.
+        When planned, the clips' filenames were already made unique (e.g. in a render
+        manifest) and are only checked against files in the render location.
+        Every submission is written to a QueueJournal, when resume is set clips that got
+        a job id in the previous (interrupted) run are skipped without asking Resolve.
+        """
+        return ChunkedTask( self.QueueClipsInSteps( clips, duplicates, planned, resume ) ).Run()
 
-        for clip in self.clips:
-            print(clip)
+    def QueueClipsInSteps( self, clips=None, duplicates='skip', planned=False, resume=False ):
+        """
+        AddClipsToRenderQueue as a generator, yields ( jobs added, jobs to add ) after
+        each job and returns the queue report, see ChunkedTask.
+        """
+        if clips is None:
+            clips = self.clips
 
-    def AddClipsToRenderQueue( self ):
         if self.renderLocation == False:
+            if self.headless:
+                raise ValueError( 'No render location set, unable to ask for one when running headless.' )
             self.AskForRenderLocation()
 
-        total_clips = len( self.clips )
-        print( f"Clips marked: {total_clips}" )
+        total_clips = len( clips )
+        log.Info( f"Clips marked: {total_clips}" )
+
+        journal = QueueJournal( self.GetQueueJournalPath() )
+        records = journal.Load() if resume else {}
+        if records:
+            remaining = [ clip for clip in clips if not records.get( journal.Key( clip ), {} ).get( 'jobId' ) ]
+            log.Info( f"Resuming, {total_clips - len( remaining )} clips were queued before" )
+            clips = remaining
+
+        if duplicates != 'allow':
+            clips = self.RemoveQueuedClips( clips, duplicates == 'replace' )
+
+        # Resumed clips keep the filenames planned for them last time
+        planner = FilenamePlanner( self.renderLocation )
+        planner.taken.update( record['fileName'].lower() for record in records.values() if 'fileName' in record )
+        fresh = [ clip for clip in clips if 'fileName' not in records.get( journal.Key( clip ), {} ) ]
+        if planned:
+            freshNames = iter( [ planner.Reserve( clip['filename'] ) for clip in fresh ] )
+        else:
+            freshNames = iter( planner.Plan( fresh, self.SanitizeFilename ) )
+        fileNames = [ records.get( journal.Key( clip ), {} ).get( 'fileName' ) or next( freshNames ) for clip in clips ]
+        journal.Start( clips, fileNames, resume )
 
-        for clip in self.clips:
-            print(clip)
-            self.AddClipToRenderQueue( clip['inPoint'], clip['outPoint'], self.renderLocation, clip['filename'] )
+        builder = self.GetRenderQueueBuilder( self.renderLocation )
+        total = len( fileNames )
+        debug = log.Enabled( 'DEBUG' )
+        try:
+            for done, ( clip, fileName ) in enumerate( zip( clips, fileNames ), 1 ):
+                if debug:
+                    log.Debug( 'Queueing clip', index=clip['index'], name=clip['name'], inPoint=clip['inPoint'], outPoint=clip['outPoint'], filename=fileName )
+                jobId = self.AddClipToRenderQueue( clip['inPoint'], clip['outPoint'], self.renderLocation, fileName, builder )
+                journal.Record( clip, jobId=jobId or None, status='queued' if jobId else 'failed' )
+                yield done, total
+        except GeneratorExit:
+            log.Info( f"Cancelled after {len( builder.timings )} of {total} clips." )
+            raise
+        finally:
+            journal.Flush()
+            report = builder.Report()
+            log.Info( f"Added {report['added']} render jobs ({report['failed']} failed) in {report['total']:.3f}s, "
+                   f"{report['average'] * 1000:.1f}ms per job, {report['setup'] * 1000:.1f}ms applying shared settings." )
+
+        # Nothing left to resume, failed clips keep the journal for --resume
+        if not report['failed']:
+            journal.Clear()
+        return report
+
+    def RunBatch( self, colors, mode='dual', renderLocation=None, projects=None, processes=None, duplicates='skip', resume=False ):
+        """
+        Run() over every timeline of the given projects (the current project if None),
+        each timeline rendering to <renderLocation>/<project>/<timeline>. Projects are
+        opened one at a time. The markers of all their timelines are fetched first, then
+        marking, validation and filename planning run in a process pool (MarkTimeline),
+        then the clips are queued timeline by timeline, starting with the current one,
+        so each timeline is switched to at most once. Returns { project: { timeline:
+        queue report, or the number of clips when there's no render location } }.
+        """
+        self.GetMarkingFunction( mode )
+        mode = MARKING_MODES.get( mode, mode )
+        manager = self.resolve.GetProjectManager()
+        pool = None
+        results = {}
+        try:
+            for name in projects or [ self.project.GetName() ]:
+                project = self.project if name == self.project.GetName() else manager.LoadProject( name )
+                if not project:
+                    log.Warning( f"Unable to open project '{name}', skipping it." )
+                    continue
+                self.SetTimeline( project=project )
+
+                jobs, timelines = self.GetBatchJobs( colors, mode, renderLocation )
+                # Starting worker processes costs more than marking a few small timelines
+                if pool is None and processes != 1 and len( jobs ) > 1 and sum( len( job['markers'] ) for job in jobs ) >= 50000:
+                    pool = self.GetProcessPool( processes )
+                marked = self.MapBatchJobs( pool, jobs )
+
+                results[ name ] = self.QueueBatch( timelines, jobs, marked, duplicates, resume )
+        finally:
+            if pool:
+                pool.shutdown()
+            log.Flush()
+        return results
+
+    def GetBatchJobs( self, colors, mode, renderLocation ):
+        # The only API calls before queueing: a handful per timeline
+        projectName = self.project.GetName()
+        current = self.project.GetCurrentTimeline()
+        currentName = current.GetName() if current else None
+
+        timelines = [ self.project.GetTimelineByIndex( index ) for index in range( 1, int( self.project.GetTimelineCount() ) + 1 ) ]
+        timelines = [ timeline for timeline in timelines if timeline ]
+        names = [ timeline.GetName() for timeline in timelines ]
+        order = sorted( range( len( timelines ) ), key=lambda position: names[ position ] != currentName )
+
+        # Selected the way MarkersByColor does: None is every colour, an empty list none
+        if colors is not None:
+            colors = [ colors ] if type( colors ) != list else list( colors )
+
+        jobs = []
+        for position in order:
+            timeline = timelines[ position ]
+            jobs.append( {
+                'timeline'      : names[ position ],
+                'colors'        : colors,
+                'mode'          : mode,
+                'markers'       : timeline.GetMarkers() or {},
+                'startFrame'    : int( timeline.GetStartFrame() ),
+                'endFrame'      : int( timeline.GetEndFrame() ),
+                'renderLocation': os.path.join( renderLocation, Slugify( projectName ) or 'project', Slugify( names[ position ] ) or f"timeline-{position + 1}" ) if renderLocation else None,
+            } )
+        return jobs, [ timelines[ position ] for position in order ]
+
+    def GetProcessPool( self, processes=None ):
+        # Worker processes are started with sys.executable, inside Resolve that isn't a Python interpreter
+        if not os.path.basename( sys.executable ).lower().startswith( 'python' ):
+            return None
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            return ProcessPoolExecutor( processes )
+        except ( ImportError, OSError, NotImplementedError ) as e:
+            log.Warning( f"Unable to start worker processes, marking timelines one by one: {e}" )
+            return None
+
+    def MapBatchJobs( self, pool, jobs ):
+        if pool:
+            try:
+                return list( pool.map( MarkTimeline, jobs ) )
+            except Exception as e:
+                log.Warning( f"Worker processes failed, marking timelines one by one: {e}" )
+        return [ MarkTimeline( job ) for job in jobs ]
+
+    def QueueBatch( self, timelines, jobs, marked, duplicates='skip', resume=False ):
+        results = {}
+        active = self.timeline.GetName() if self.timeline else None
+        for timeline, job, result in zip( timelines, jobs, marked ):
+            name = job['timeline']
+            clips = result['clips']
+            log.Info( f"{name}: {len( clips )} clips" )
+            if result['problems']:
+                log.Warning( f"{name}: check before queueing: {result['problems']}" )
+
+            if not clips or not job['renderLocation']:
+                results[ name ] = len( clips )
+                continue
+
+            # Render jobs are added for the current timeline
+            if name != active:
+                if not self.project.SetCurrentTimeline( timeline ):
+                    log.Warning( f"Unable to switch to timeline '{name}', skipping it." )
+                    continue
+                active = name
+            self.SetTimeline( timeline )
+
+            os.makedirs( job['renderLocation'], exist_ok=True )
+            self.renderLocation = job['renderLocation']
+            results[ name ] = self.AddClipsToRenderQueue( clips, duplicates, planned=True, resume=resume )
+        return results
+
+    def GetQueueJournalPath( self ):
+        key = hashlib.sha1( json.dumps( [ self.project.GetName(), self.GetTimelineKey(), os.path.normcase( self.renderLocation ) ] ).encode( 'utf-8' ) ).hexdigest()
+        return os.path.join( GetCacheDirectory(), 'journals', f"{key}.jsonl" )
+
+    def RemoveQueuedClips( self, clips, replace=False ):
+        # Clips that already have a render job are dropped, or their job deleted so they're queued again
+        index = RenderJobIndex( self.project )
+        timelineName = self.timeline.GetName()
+
+        remaining = []
+        queued = 0
+        for clip in clips:
+            jobId = index.Find( timelineName, clip['inPoint'], clip['outPoint'], self.renderLocation, clip['filename'] )
+            if jobId is None:
+                remaining.append( clip )
+            elif replace and self.project.DeleteRenderJob( jobId ):
+                remaining.append( clip )
+                queued = queued + 1
+            else:
+                queued = queued + 1
 
-    def AddClipToRenderQueue( self, inPoint, outPoint, location, fileName ):
-        frameRate = self.project.GetSetting('timelineFrameRate')
-        height = self.project.GetSetting('timelineResolutionHeight')
-        width = self.project.GetSetting('timelineResolutionWidth')
-        ratio = self.CalculateAspectRatio( height, width )
-        inPoint = int( inPoint )
-        outPoint = int( outPoint )
+        if queued:
+            log.Info( f"{'Replacing' if replace else 'Skipping'} {queued} clips already in the render queue" )
+        return remaining
+
+    def WriteRenderManifests( self, directory, workers, clips=None ):
+        """
+        Splits the clips between render machines so each gets a similar number of frames
+        to render, and writes a JSON job manifest per machine for QueueManifest to load.
+        Filenames are planned across all clips first, so they stay unique between machines.
+        """
+        if clips is None:
+            clips = self.clips
+
+        fileNames = FilenamePlanner( self.renderLocation or None ).Plan( clips, self.SanitizeFilename )
+        jobs = [
+            {
+                'index'     : clip['index'],
+                'name'      : clip['name'],
+                'filename'  : fileName,
+                'inPoint'   : clip['inPoint'],
+                'outPoint'  : clip['outPoint'],
+                'frames'    : clip['frames'],
+            }
+            for clip, fileName in zip( clips, fileNames )
+        ]
 
+        os.makedirs( directory, exist_ok=True )
+        timelineName = self.timeline.GetName()
+        paths = []
+        shards = ShardClips( jobs, workers )
+        for worker, shard in enumerate( shards, 1 ):
+            path = os.path.join( directory, f"{Slugify( timelineName ) or 'timeline'}_worker{worker:02d}.json" )
+            with open( path, 'w', encoding='utf-8' ) as file:
+                json.dump( {
+                    'project'           : self.project.GetName(),
+                    'timeline'          : timelineName,
+                    'renderLocation'    : self.renderLocation or None,
+                    'renderPreset'      : self.renderPreset or None,
+                    'worker'            : worker,
+                    'workers'           : workers,
+                    'frames'            : sum( job['frames'] for job in shard ),
+                    'clips'             : shard,
+                }, file, indent=4 )
+            paths.append( path )
+
+        loads = [ sum( job['frames'] for job in shard ) for shard in shards ]
+        ideal = sum( loads ) / workers if workers else 0
+        log.Info( f"Split {len( jobs )} clips between {workers} workers, frames per worker: {', '.join( str( load ) for load in loads )} "
+               f"(longest {max( loads, default=0 )}, ideal {ideal:.0f})" )
+        return paths
+
+    def QueueManifest( self, path, renderLocation=None, duplicates='skip' ):
+        """
+        Queues the clips from a manifest written by WriteRenderManifests, on this machine.
+        The manifest's render location is used unless another one is given.
+        """
+        with open( path, encoding='utf-8' ) as file:
+            manifest = json.load( file )
+
+        if self.project.GetName() != manifest['project']:
+            project = self.resolve.GetProjectManager().LoadProject( manifest['project'] )
+            if not project:
+                raise ValueError( f"Unable to open project '{manifest['project']}'." )
+            self.SetTimeline( project=project )
+
+        timeline = self.FindTimeline( manifest['timeline'] )
+        if not timeline:
+            raise ValueError( f"Unable to find timeline '{manifest['timeline']}' in project '{manifest['project']}'." )
+        self.project.SetCurrentTimeline( timeline )
+        self.SetTimeline( timeline )
+
+        renderLocation = renderLocation or manifest['renderLocation']
+        if not renderLocation:
+            raise ValueError( f"No render location in '{path}', give one to queue its clips." )
+        self.renderLocation = os.path.normpath( renderLocation )
+        self.renderPreset = manifest.get( 'renderPreset' ) or False
+        return self.AddClipsToRenderQueue( manifest['clips'], duplicates, planned=True )
+
+    def FindTimeline( self, name ):
+        for index in range( 1, int( self.project.GetTimelineCount() ) + 1 ):
+            timeline = self.project.GetTimelineByIndex( index )
+            if timeline and timeline.GetName() == name:
+                return timeline
+        return None
+
+    def MonitorRenders( self, jobs ):
+        """
+        Starts rendering the given ( jobId, frames ) pairs, returns the RenderMonitor
+        following them in the background.
+        """
+        self.renderMonitor = RenderMonitor( self.project, jobs ).Start()
+        return self.renderMonitor
+
+    def ReportRenders( self, path=None ):
+        report = self.renderMonitor.Report( path )
+        fps = f"{report['fps']:.1f}fps" if report['fps'] else 'n/a'
+        log.Info( f"Rendered {report['completed']} jobs ({report['failed']} failed), {report['frames']} frames in {report['wallTime']:.1f}s at {fps}, {report['polls']} status polls" )
+        if path:
+            log.Info( f"Render report written to {path}" )
+        return report
+
+    def GetRenderSettings( self, location ):
+        """
+        Render settings shared by every clip, MarkIn / MarkOut / CustomName are set per job.
+        When a render preset is used only the settings the preset doesn't cover are returned.
+        """
         settings = {
             "SelectAllFrames": False,  # Bool (when set True, the settings MarkIn and MarkOut are ignored)
-            "MarkIn": inPoint,  # int
-            "MarkOut": outPoint,  # int
             "TargetDir": location,  # string
-            "CustomName": fileName,  # string
             "UniqueFilenameStyle": 0,  # 0 - Prefix, 1 - Suffix
+        }
+
+        if self.renderPreset:
+            return settings
+
+        settings.update({
             "ExportVideo": True,  # Bool
             "ExportAudio": True,  # Bool
-            "FormatWidth": width,  # int
-            "FormatHeight": height,  # int
-            "FrameRate": frameRate,  # float (examples: 23.976, 24)
-            "PixelAspectRatio": ratio,  # string (for SD resolution: "16_9" or "4_3") (other resolutions: "square" or "cinemascope")
+            "FormatWidth": self.context.width,  # int
+            "FormatHeight": self.context.height,  # int
+            "FrameRate": self.context.frameRate,  # float (examples: 23.976, 24)
+            "PixelAspectRatio": self.context.aspectRatio,  # string (for SD resolution: "16_9" or "4_3") (other resolutions: "square" or "cinemascope")
             "VideoQuality": 0,  # possible values for current codec (if applicable):
                                 # 0 (int) - will set quality to automatic
                                 # [1 -> MAX] (int) - will set input bit rate
@@ -599,33 +2933,28 @@ class MarkerManager:
             "MultiPassEncode": False,  # Bool. Can only be set for H.264.
             "AlphaMode": 0,  # 0 - Premultiplied, 1 - Straight. Can only be set if "ExportAlpha" is true.
             "NetworkOptimization": False  # Bool. Only supported by QuickTime and MP4 formats.
-        }
+        })
+        return settings
 
-        self.project.SetRenderSettings( settings )
+    def GetRenderQueueBuilder( self, location ):
+        return RenderQueueBuilder( self.project, self.GetRenderSettings( location ), self.renderPreset )
 
-        jobId = self.project.AddRenderJob()
+    def AddClipToRenderQueue( self, inPoint, outPoint, location, fileName, builder=None ):
+        if builder is None:
+            builder = self.GetRenderQueueBuilder( location )
+
+        jobId = builder.AddJob( inPoint, outPoint, fileName )
         if jobId:
-            print(f"Added render job with id: {jobId}")
+            log.Debug( 'Added render job', jobId=jobId, filename=fileName )
         else:
-            print("Failed to add render job")
+            log.Warning( 'Failed to add render job', inPoint=inPoint, outPoint=outPoint, filename=fileName )
+        return jobId
 
     def Slugify(self, value, allow_unicode=False):
-        """
-        Taken from https://github.com/django/django/blob/master/django/utils/text.py
-        Convert to ASCII if 'allow_unicode' is False. Convert spaces or repeated
-        dashes to single dashes. Remove characters that aren't alphanumerics,
-        underscores, or hyphens. Convert to lowercase. Also strip leading and
-        trailing whitespace, dashes, and underscores.
-        """
-        value = str(value)
-        if allow_unicode:
-            value = unicodedata.normalize('NFKC', value)
-        else:
-            value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
-        value = re.sub(r'[^\w\s-]', '', value.lower())
-        return re.sub(r'[-\s]+', '-', value).strip('-_')
+        return Slugify( str(value), allow_unicode )
 
     def IsWriteable( self, path ):
+        import tempfile
         try:
             testfile = tempfile.TemporaryFile(dir = path)
             testfile.close()
@@ -647,8 +2976,7 @@ class MarkerManager:
         #     return self.AskForRenderLocation()
        
     def SanitizeFilename( self, string ):
-        string = string.split('-')[0]
-        return self.Slugify( string )
+        return SanitizeFilename( string )
        
     def CalculateDuration( self, inPoint, outPoint ):
         if int( outPoint ) < int( inPoint ):
@@ -658,17 +2986,7 @@ class MarkerManager:
             return self.FramesToDuration( diff_frames )
        
     def FramesToDuration( self, diff_frames ):
-            frameRate = self.project.GetSetting('timelineFrameRate')
-            diff_seconds, diff_frames = divmod( diff_frames, frameRate )
-            diff_minutes, diff_seconds = divmod( diff_seconds, 60 )
-            diff_hours, diff_minutes = divmod( diff_minutes, 60 )
-
-            diff_hours = int(diff_hours)
-            diff_minutes = int(diff_minutes)
-            diff_seconds = int(diff_seconds)
-            diff_frames = int(diff_frames)
-
-            return f'{diff_hours:02d}:{diff_minutes:02d}:{diff_seconds:02d}:{diff_frames:02d}'
+        return self.context.timecode.ToTimecode( diff_frames )
 
     def MarkClipsUsingDualMarkers( self, markers = {} ):
         if len( markers ) == 0 and len( self.markers ) != 0:
@@ -680,11 +2998,11 @@ class MarkerManager:
         markerIn = False
 
         # Account for timelines that dont start with 00:00:00:00 timecode
-        startFrame = self.timeline.GetStartFrame()
+        startFrame = self.context.startFrame
 
         # Loop through markers and mark clips based on the chosen clip-selection style
         # - At the moment it marks clips using markers with names and the next marker in the sequence as the out point
-        for frame, marker in markers.items():
+        for frame, marker in sorted( markers.items(), key=lambda item: item[0] ):
 
             if not marker['name'].startswith('Marker '):
                 if markIn != -1:
@@ -710,10 +3028,10 @@ class MarkerManager:
             markers = self.markers
         
         index = 1
-        startFrame = self.timeline.GetStartFrame()
+        startFrame = self.context.startFrame
         
         # Loop through markers and use their duration
-        for frame, marker in markers.items():
+        for frame, marker in sorted( markers.items(), key=lambda item: item[0] ):
 
             markIn = startFrame + frame
             # Get marker duration (in frames)
@@ -725,6 +3043,265 @@ class MarkerManager:
         
         return self
 
+    def MarkClipsInBatch( self, mode, markers = {} ):
+        """
+        Same output as MarkClipsUsingDualMarkers / MarkClipsUsingMarkerDuration, worked
+        out by the ClipMarkingEngine instead of marker by marker.
+        """
+        ChunkedTask( self.MarkClipsInSteps( mode, markers ) ).Run()
+        return self
+
+    def MarkClipsInSteps( self, mode, markers = {} ):
+        """
+        MarkClipsInBatch as a generator, yields ( clips marked, clips to mark ) every
+        few hundred clips, see ChunkedTask. Marking makes no API calls, so there's no
+        need to yield after every clip.
+        """
+        if len( markers ) == 0 and len( self.markers ) != 0:
+            markers = self.markers
+
+        engine = self.GetMarkingEngine( markers )
+        inPoints, outPoints, positions = self.GetMarkingColumns( mode, engine )
+        positions = positions.tolist() if hasattr( positions, 'tolist' ) else positions
+        total = len( positions )
+        # Added to the clip table a few thousand clips at a time rather than clip by clip
+        for start in range( 0, total, 4096 ):
+            end = min( start + 4096, total )
+            self.clips.Extend( inPoints[ start:end ], outPoints[ start:end ], [ engine.markers[ position ] for position in positions[ start:end ] ], start + 1 )
+            yield end, total
+        yield total, total
+        return self
+
+    def GetMarkingEngine( self, markers ):
+        # Markers selected with Markers() / MarkersByColor() are read from the marker index
+        # they were selected from, other marker dicts are sorted first
+        index, positions, selected = self.markerSelection
+        if markers is selected and index is self.markerIndex:
+            return ClipMarkingEngine.FromIndex( index, self.context.startFrame, positions )
+        return ClipMarkingEngine.FromMarkers( markers, self.context.startFrame )
+
+    def GetMarkingColumns( self, mode, engine ):
+        if MARKING_MODES.get( mode, mode ) == 'MarkClipsUsingDualMarkers':
+            return engine.DualMarkers()
+        return engine.MarkerDuration()
+
+    def GetMarkedClips( self, mode, markers ):
+        engine = ClipMarkingEngine.FromMarkers( markers, self.context.startFrame )
+        marked = ClipMarkingEngine.Rows( self.GetMarkingColumns( mode, engine ) )
+        return [ ( inPoint, outPoint, engine.markers[ position ] ) for inPoint, outPoint, position in marked ]
+
+    def GetTimelineKey( self ):
+        try:
+            return self.timeline.GetUniqueId()
+        except AttributeError:
+            return self.timeline.GetName()
+
+    def MarkClipsIncrementally( self, mode, markers = {} ):
+        """
+        Marks clips like MarkClipsInBatch, but when this timeline was marked before with
+        the same mode only the clips around markers that were added, removed or changed
+        since then are recomputed. Returns a ClipChangeSet against the previous run.
+        """
+        if len( markers ) == 0 and len( self.markers ) != 0:
+            markers = self.markers
+
+        mode = MARKING_MODES.get( mode, mode )
+        startFrame = self.context.startFrame
+        key = self.GetTimelineKey()
+        previous = self.snapshots.get( key ) or self.LoadSnapshot()
+        changes = ClipChangeSet()
+
+        if previous is not None:
+            oldMarkers = previous['markers']
+            changed = [ frame for frame in markers if frame not in oldMarkers or oldMarkers[ frame ] != markers[ frame ] ]
+            changed += [ frame for frame in oldMarkers if frame not in markers ]
+
+        if previous is None or previous['mode'] != mode or previous['startFrame'] != startFrame:
+            self.clips = ClipTable( self )
+            self.MarkClipsInBatch( mode, markers )
+            changes.added = list( self.clips )
+        elif not changed:
+            self.clips = previous['clips'].Copy()
+        else:
+            # Work out which markers could have their clips affected by the change
+            oldClips = previous['clips']
+            if mode == 'MarkClipsUsingDualMarkers':
+                # Pairing always restarts after an unnamed marker, so only clips opened
+                # between the unnamed markers either side of the changes can differ.
+                index = MarkerIndex( markers )
+                unnamed = [ frame for frame, flag in zip( index.frames, index.unnamed ) if flag ]
+                first = bisect.bisect_left( unnamed, min( changed ) )
+                last = bisect.bisect_right( unnamed, max( changed ) )
+                lo = unnamed[ first - 1 ] if first > 0 else float('-inf')
+                hi = unnamed[ last ] if last < len( unnamed ) else float('inf')
+                affected = lambda frame: lo < frame < hi
+                window = { frame: marker for frame, marker in markers.items() if lo < frame <= hi }
+            else:
+                changed = set( changed )
+                affected = lambda frame: frame in changed
+                window = { frame: markers[ frame ] for frame in changed if frame in markers }
+
+            marked = self.GetMarkedClips( mode, window )
+            remarked = { inPoint: ( inPoint, outPoint, marker ) for inPoint, outPoint, marker in marked }
+            kept = [
+                ( clip['inPoint'], clip['outPoint'], oldClips.markers[ clip.position ] )
+                for clip in oldClips if not affected( clip['inPoint'] - startFrame )
+            ]
+            replaced = { clip['inPoint']: clip for clip in oldClips if affected( clip['inPoint'] - startFrame ) }
+
+            self.clips = ClipTable( self )
+            clipNo = 1
+            for inPoint, outPoint, marker in sorted( kept + marked, key=lambda clip: clip[0] ):
+                self.MarkClip( inPoint, outPoint, marker, clipNo )
+                if inPoint in remarked:
+                    old = replaced.get( inPoint )
+                    clip = self.clips[ -1 ]
+                    if old is None:
+                        changes.added.append( clip )
+                    elif any( old[ field ] != clip[ field ] for field in ( 'outPoint', 'name', 'note', 'color' ) ):
+                        changes.modified.append( clip )
+                clipNo = clipNo + 1
+            changes.removed = [ clip for inPoint, clip in replaced.items() if inPoint not in remarked ]
+
+        # A copy, marking more clips afterwards appends to self.clips
+        self.snapshots[ key ] = {
+            'mode'          : mode,
+            'startFrame'    : startFrame,
+            'markers'       : dict( markers ),
+            'clips'         : self.clips.Copy(),
+        }
+        self.SaveSnapshot( self.snapshots[ key ] )
+        return changes
+
+    def MarkChangedClipsInSteps( self, mode, markers = {} ):
+        """
+        MarkClipsIncrementally as a single step for ChunkedTask, returns the ClipChangeSet.
+        """
+        yield 0, 1
+        changes = self.MarkClipsIncrementally( mode, markers )
+        yield 1, 1
+        return changes
+
+    def GetSnapshotKey( self ):
+        return hashlib.sha1( json.dumps( [ self.project.GetName(), self.GetTimelineKey() ] ).encode( 'utf-8' ) ).hexdigest()
+
+    def LoadSnapshot( self ):
+        """
+        The marker snapshot saved by the last incremental run on this timeline, in this
+        or an earlier session, or None.
+        """
+        if not self.snapshotCache:
+            return None
+        entry = self.snapshotCache.Load( self.GetSnapshotKey() )
+        if entry is None:
+            return None
+
+        markers = { frame: marker for frame, marker in entry['markers'] }
+        try:
+            clipMarkers = [ markers[ inPoint - entry['startFrame'] ] for inPoint in entry['clips']['inPoints'] ]
+        except ( KeyError, TypeError ):
+            return None
+        return {
+            'mode'          : entry['mode'],
+            'startFrame'    : entry['startFrame'],
+            'markers'       : markers,
+            'clips'         : ClipTable( self ).Load( entry['clips'], clipMarkers ),
+        }
+
+    def SaveSnapshot( self, snapshot ):
+        # Clips start on the marker they were marked from, so only their points are saved
+        if self.snapshotCache:
+            self.snapshotCache.Save( self.GetSnapshotKey(), {
+                'mode'          : snapshot['mode'],
+                'startFrame'    : snapshot['startFrame'],
+                'markers'       : list( snapshot['markers'].items() ),
+                'clips'         : snapshot['clips'].Columns(),
+            } )
+
+SLUG_INVALID = re.compile( r'[^\w\s-]' )
+SLUG_SEPARATORS = re.compile( r'[-\s]+' )
+
+@functools.lru_cache( maxsize=4096 )
+def Slugify(value, allow_unicode=False):
+    """
+    Taken from https://github.com/django/django/blob/master/django/utils/text.py
+    Convert to ASCII if 'allow_unicode' is False. Convert spaces or repeated
+    dashes to single dashes. Remove characters that aren't alphanumerics,
+    underscores, or hyphens. Convert to lowercase. Also strip leading and
+    trailing whitespace, dashes, and underscores.
+    """
+    if allow_unicode:
+        value = unicodedata.normalize('NFKC', value)
+    else:
+        value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+    value = SLUG_INVALID.sub('', value.lower())
+    return SLUG_SEPARATORS.sub('-', value).strip('-_')
+
+def SanitizeFilename( string ):
+    string = string.split('-')[0]
+    return Slugify( string )
+
+def MarkTimeline( job ):
+    """
+    The pure Python part of marking one timeline for MarkerManager.RunBatch, so it can
+    run in a worker process: selects markers by colour, marks clips, validates them and
+    plans their filenames. job only holds plain values, so it pickles cheaply.
+    """
+    index = MarkerIndex( job['markers'] )
+    engine = ClipMarkingEngine.FromIndex( index, job['startFrame'], index.Positions( job['colors'] ) )
+    marked = ClipMarkingEngine.Rows( engine.DualMarkers() if job['mode'] == 'MarkClipsUsingDualMarkers' else engine.MarkerDuration() )
+
+    clips = [
+        { 'index': f"{number:002d}", 'name': engine.markers[ position ]['name'], 'inPoint': inPoint, 'outPoint': outPoint }
+        for number, ( inPoint, outPoint, position ) in enumerate( marked, 1 )
+    ]
+    for clip, fileName in zip( clips, FilenamePlanner( job['renderLocation'] ).Plan( clips, SanitizeFilename ) ):
+        clip['filename'] = fileName
+
+    validation = ClipValidation( [ clip['inPoint'] for clip in clips ], [ clip['outPoint'] for clip in clips ], job['startFrame'], job['endFrame'] )
+    return { 'clips': clips, 'problems': validation.Summary() }
+
+def ShardClips( clips, workers ):
+    """
+    Splits clips into groups with balanced total frames, longest clips first, each going
+    to the group with the fewest frames so far (longest-processing-time bin packing).
+    Groups keep the clips in timeline order.
+    """
+    shards = [ [] for worker in range( max( 1, workers ) ) ]
+    loads = [ ( 0, worker ) for worker in range( len( shards ) ) ]
+    for clip in sorted( clips, key=lambda clip: clip['frames'], reverse=True ):
+        load, worker = heapq.heappop( loads )
+        shards[ worker ].append( clip )
+        heapq.heappush( loads, ( load + clip['frames'], worker ) )
+    for shard in shards:
+        shard.sort( key=lambda clip: clip['inPoint'] )
+    return shards
+
+def CalculateAspectRatio(height, width):
+    # Convert inputs to integers if they're not already
+    height = int(height)
+    width = int(width)
+
+    # Calculate the Greatest Common Divisor of height and width
+    gcd_val = gcd(height, width)
+
+    # Divide height and width by the gcd to get simplified ratio
+    ratio_height = height // gcd_val
+    ratio_width = width // gcd_val
+
+    # Return the ratio in the required format
+    return f"{ratio_width}_{ratio_height}"
+
+def GetCacheDirectory():
+    # Per-user directory for MarkerMan's preferences and caches
+    if sys.platform.startswith("darwin"):
+        base = os.path.expanduser( "~/Library/Application Support" )
+    elif sys.platform.startswith("win") or sys.platform.startswith("cygwin"):
+        base = os.getenv('APPDATA') or os.path.expanduser( "~" )
+    else:
+        base = os.getenv('XDG_CACHE_HOME') or os.path.expanduser( "~/.cache" )
+    return os.path.join( base, 'MarkerMan' )
+
 def GetBMD():
     try:
     # The PYTHONPATH needs to be set correctly for this import statement to work.
@@ -739,19 +3316,118 @@ def GetBMD():
             expectedPath="/opt/resolve/libs/Fusion/Modules/"
 
         # check if the default path has it...
-        print("Unable to find module DaVinciResolveScript from $PYTHONPATH - trying default locations")
+        log.Warning("Unable to find module DaVinciResolveScript from $PYTHONPATH - trying default locations")
         try:
             import imp
             bmd = imp.load_source('DaVinciResolveScript', expectedPath+"DaVinciResolveScript.py")
         except ImportError:
             # No fallbacks ... report error:
-            print("Unable to find module DaVinciResolveScript, there could be a few reasons for this:")
-            print("- DaVinciResolveScript is not discoverable by python")
-            print("- Python version is higher than 3.12 and doesn't support the imp module (deprecated)")
-            print("For a default DaVinci Resolve installation, the module is expected to be located in: "+expectedPath)
+            log.Error("Unable to find module DaVinciResolveScript, there could be a few reasons for this:")
+            log.Error("- DaVinciResolveScript is not discoverable by python")
+            log.Error("- Python version is higher than 3.12 and doesn't support the imp module (deprecated)")
+            log.Error("For a default DaVinci Resolve installation, the module is expected to be located in: "+expectedPath)
             sys.exit()
 
     return bmd
 
-mm = MarkerManager()
+def GetNumPy():
+    # NumPy is optional, it isn't available to Resolve's Python by default
+    global numpy
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+    return numpy
 
+def GetFusionApp():
+    # Resolve provides 'app' to scripts run from the Workspace -> Scripts menu
+    try:
+        return app
+    except NameError:
+        return False
+
+def Main( argv=None ):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='MarkerMan',
+        description='Mark clips from timeline markers and add them to the render queue without any dialogs.'
+    )
+    parser.add_argument( '--colors', nargs='+', default=[], metavar='COLOR', help='Marker colours to mark clips with, e.g. Blue Green' )
+    parser.add_argument( '--mode', default='dual', choices=list( MARKING_MODES ), help='dual: named markers are IN points, the next marker is the OUT point. duration: marker durations denote the clip.' )
+    parser.add_argument( '--render-dir', default=None, help='Directory to render to, clips are only listed if omitted.' )
+    parser.add_argument( '--render-preset', default=False, help='Name of a render preset to use instead of the default render settings.' )
+    parser.add_argument( '--duplicates', default='skip', choices=[ 'skip', 'replace', 'allow' ], help='What to do with clips that are already in the render queue.' )
+    parser.add_argument( '--incremental', action='store_true', help='Only list or queue the clips that changed since the previous incremental run on this timeline.' )
+    parser.add_argument( '--resume', action='store_true', help='Only queue the clips that did not get a render job in the previous, interrupted run.' )
+    parser.add_argument( '--render', action='store_true', help='Start rendering the queued jobs and wait for them to finish.' )
+    parser.add_argument( '--render-report', default=None, metavar='PATH', help='Write a JSON report of render times and frames per second, with --render.' )
+    parser.add_argument( '--all-timelines', action='store_true', help='Mark and queue every timeline of the project instead of only the current one, each rendering to its own folder.' )
+    parser.add_argument( '--projects', nargs='+', default=None, metavar='PROJECT', help='Like --all-timelines, for each of these projects.' )
+    parser.add_argument( '--processes', type=int, default=None, help='Worker processes to mark timelines with, with --all-timelines or --projects.' )
+    parser.add_argument( '--workers', type=int, default=0, help='Split the clips between this many render machines and write a job manifest for each instead of queueing.' )
+    parser.add_argument( '--manifest-dir', default='.', help='Where to write the job manifests, with --workers.' )
+    parser.add_argument( '--manifest', default=None, metavar='PATH', help='Queue the clips from a job manifest written with --workers.' )
+    parser.add_argument( '--no-cache', action='store_true', help="Don't keep the marker snapshots --incremental compares against between runs." )
+    parser.add_argument( '--schedule', action='store_true', help='Cache repeated reads, merge render settings changes and retry calls Resolve fails while busy.' )
+    parser.add_argument( '--rate-limit', type=float, default=None, metavar='CALLS', help='At most this many API calls per second, implies --schedule.' )
+    parser.add_argument( '--retries', type=int, default=3, help='Retries for calls that fail while Resolve is busy, with --schedule.' )
+    parser.add_argument( '--log-level', default='INFO', choices=list( Logger.levels ), help='DEBUG also logs every clip and render job.' )
+    parser.add_argument( '--log-file', default=None, metavar='PATH', help='Also append the log to PATH as JSON lines.' )
+    parser.add_argument( '--profile', default=None, metavar='PATH', help='Count and time every Resolve API call, print a summary and write a Chrome trace (chrome://tracing) to PATH.' )
+    parser.add_argument( '--import-markers', default=None, metavar='PATH', help='Add markers from a .csv, .jsonl or .edl marker list before marking clips.' )
+    parser.add_argument( '--export-markers', default=None, metavar='PATH', help='Write the timeline markers (of --colors if given) to a .csv, .jsonl or .edl marker list.' )
+    args = parser.parse_args( argv )
+
+    if not args.colors and not args.import_markers and not args.export_markers and not args.manifest:
+        parser.error( 'Nothing to do, give --colors, --manifest, --import-markers or --export-markers.' )
+    if ( args.all_timelines or args.projects ) and not args.colors:
+        parser.error( '--all-timelines and --projects need --colors.' )
+
+    log.Configure( args.log_level, args.log_file )
+    profiler = ApiProfiler( trace=True ) if args.profile else None
+    scheduler = BridgeScheduler( args.rate_limit, args.retries ) if args.schedule or args.rate_limit else None
+    mm = MarkerManager( headless=True, profiler=profiler, cache=not args.no_cache, scheduler=scheduler )
+
+    unknown = [ color for color in args.colors if color not in mm.GetMarkerColors() ]
+    if unknown:
+        parser.error( f"Unknown marker colours: {', '.join( unknown )}" )
+
+    progress = lambda count: log.Info( f"{count} markers..." )
+
+    if args.import_markers:
+        mm.ImportMarkers( args.import_markers, progress=progress )
+
+    if args.manifest:
+        report = mm.QueueManifest( args.manifest, args.render_dir, args.duplicates )
+        if args.render and report['jobs']:
+            mm.MonitorRenders( report['jobs'] ).Wait()
+            mm.ReportRenders( args.render_report )
+        elif args.render:
+            log.Info( 'No new render jobs to render.' )
+    elif args.export_markers:
+        mm.ExportMarkers( args.export_markers, color=args.colors or None, progress=progress )
+    elif args.all_timelines or args.projects:
+        mm.renderPreset = args.render_preset
+        mm.RunBatch( args.colors, args.mode, args.render_dir, args.projects, args.processes, args.duplicates, args.resume )
+    elif args.workers:
+        mm.renderLocation = os.path.normpath( args.render_dir ) if args.render_dir else False
+        mm.renderPreset = args.render_preset
+        mm.Run( args.colors, args.mode, queue=False )
+        mm.WriteRenderManifests( args.manifest_dir, args.workers )
+    elif args.colors:
+        mm.Run( args.colors, args.mode, args.render_dir, renderPreset=args.render_preset, incremental=args.incremental, render=args.render, renderReport=args.render_report, duplicates=args.duplicates, resume=args.resume )
+
+    if scheduler:
+        log.Info( scheduler.Summary() )
+    if profiler:
+        log.Info( profiler.Summary() )
+        profiler.WriteTrace( args.profile )
+    log.Flush()
+    return 0
+
+if __name__ == '__main__' and len( getattr( sys, 'argv', [] ) ) > 1:
+    sys.exit( Main() )
+elif __name__ == '__main__' or GetFusionApp():
+    mm = MarkerManager()
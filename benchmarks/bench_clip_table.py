@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+"""
+Memory and build time of the ClipTable against the list of clip dicts MarkClip used to build.
+
+    python benchmarks/bench_clip_table.py [clips]
+"""
+
+import os, sys, time, tracemalloc
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from MarkerMan import MarkerManager, ClipTable, Timecode
+
+class Formatter:
+    # Formats like a MarkerManager on a 25fps timeline, without needing Resolve
+    timecode = Timecode( 25 )
+
+    def FramesToDuration( self, frames ):
+        return MarkerManager.FramesToDuration( self, frames )
+
+    def CalculateDuration( self, inPoint, outPoint ):
+        return MarkerManager.CalculateDuration( self, inPoint, outPoint )
+
+    def SanitizeFilename( self, string ):
+        return MarkerManager.SanitizeFilename( self, string )
+
+    @property
+    def context( self ):
+        return self
+
+def GetMarkers( count ):
+    colors = [ 'Blue', 'Green', 'Yellow', 'Pink' ]
+    return [
+        { 'name': f"Scene {index} - Act 1", 'note': f"Note {index}", 'color': colors[ index % len( colors ) ], 'duration': 250, 'customData': '' }
+        for index in range( count )
+    ]
+
+def BuildDicts( formatter, markers ):
+    clips = []
+    for index, marker in enumerate( markers, 1 ):
+        inPoint = 86400 + index * 300
+        outPoint = inPoint + marker['duration']
+        clips.append({
+            'index'     : f"{index:002d}",
+            'inPoint'   : inPoint,
+            'outPoint'  : outPoint,
+            'filename'  : f"{index:02d}_{formatter.SanitizeFilename( marker['name'] )}",
+            'name'      : marker['name'],
+            'note'      : marker['note'],
+            'color'     : marker['color'],
+            'frames'    : outPoint - inPoint,
+            'duration'  : formatter.CalculateDuration( inPoint, outPoint ),
+        })
+    return clips
+
+def BuildTable( formatter, markers ):
+    clips = ClipTable( formatter )
+    for index, marker in enumerate( markers, 1 ):
+        inPoint = 86400 + index * 300
+        clips.Add( inPoint, inPoint + marker['duration'], marker, index )
+    return clips
+
+def Measure( build, formatter, markers ):
+    tracemalloc.start()
+    started = time.perf_counter()
+    clips = build( formatter, markers )
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return clips, elapsed, memory
+
+def Main( count ):
+    formatter = Formatter()
+    markers = GetMarkers( count )
+
+    # Timing runs without tracemalloc, which slows allocation heavy code down
+    for name, build in ( ( 'dicts', BuildDicts ), ( 'ClipTable', BuildTable ) ):
+        started = time.perf_counter()
+        build( formatter, markers )
+        elapsed = time.perf_counter() - started
+        clips, _, memory = Measure( build, formatter, markers )
+        print( f"{name:>10}: {count} clips built in {elapsed:.3f}s, {memory / 1024 / 1024:.1f}MB" )
+
+if __name__ == '__main__':
+    Main( int( sys.argv[1] ) if len( sys.argv ) > 1 else 100000 )
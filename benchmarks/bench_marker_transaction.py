@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Marker edit throughput of MarkerTransaction against the delete-then-add loops it replaced.
+
+    python benchmarks/bench_marker_transaction.py [markers] [latency in ms]
+"""
+
+import os, sys, time
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from MarkerMan import MarkerTransaction
+from fake_resolve import FakeTimeline, GenerateMarkers
+
+def EditLoop( timeline, markers, color ):
+    for frame, marker in markers.items():
+        if timeline.DeleteMarkerAtFrame( frame ):
+            timeline.AddMarker( frame, color, marker['name'], marker['note'], marker['duration'], marker['customData'] )
+
+def DeleteLoop( timeline ):
+    for frame in timeline.GetMarkers().keys():
+        timeline.DeleteMarkerAtFrame( frame )
+
+def Report( name, count, elapsed ):
+    print( f"{name:>32}: {count} markers in {elapsed:.3f}s ({count / elapsed:.0f} markers/s)" )
+
+def Main( count, latency ):
+    markers = GenerateMarkers( count )
+    recolored = { frame: dict( marker, color='Blue' ) for frame, marker in markers.items() }
+
+    timeline = FakeTimeline( markers, latency=latency )
+    started = time.perf_counter()
+    EditLoop( timeline, markers, 'Blue' )
+    Report( 'edit loop', count, time.perf_counter() - started )
+
+    timeline = FakeTimeline( markers, latency=latency )
+    stats = MarkerTransaction( timeline ).Apply( recolored )
+    Report( f"edit transaction ({stats['calls']} calls)", stats['markers'], stats['elapsed'] )
+
+    timeline = FakeTimeline( markers, latency=latency )
+    started = time.perf_counter()
+    DeleteLoop( timeline )
+    Report( 'delete loop', count, time.perf_counter() - started )
+
+    timeline = FakeTimeline( markers, latency=latency )
+    stats = MarkerTransaction( timeline ).Apply( {} )
+    Report( f"delete transaction ({stats['calls']} calls)", stats['markers'], stats['elapsed'] )
+
+if __name__ == '__main__':
+    Main(
+        int( sys.argv[1] ) if len( sys.argv ) > 1 else 10000,
+        float( sys.argv[2] ) / 1000 if len( sys.argv ) > 2 else 0.0001,
+    )
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""
+Startup time: importing MarkerMan and getting a MarkerManager to the point where it
+draws its first dialog, with a cold and a warm preferences cache.
+
+    python benchmarks/bench_startup.py [runs]
+"""
+
+import os, sys, json, time, subprocess, statistics, tempfile
+
+root = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+# Runs in a fresh interpreter so module imports aren't already cached
+STARTUP = """
+import sys, time
+started = time.perf_counter()
+sys.path[:0] = [ {root!r}, {benchmarks!r} ]
+import MarkerMan
+imported = time.perf_counter()
+from fake_resolve import CreateResolve
+
+try:
+    MarkerMan.MarkerManager( CreateResolve() )
+    ready = time.perf_counter()
+except Exception as e:
+    ready = None
+print( imported - started, ready - started if ready else -1 )
+"""
+
+def Measure( script, env, runs ):
+    imports = []
+    readies = []
+    for run in range( runs ):
+        output = subprocess.run( [ sys.executable, '-c', script ], env=env, capture_output=True, text=True ).stdout.split()
+        imported, ready = float( output[-2] ), float( output[-1] )
+        imports.append( imported )
+        if ready >= 0:
+            readies.append( ready )
+    return statistics.median( imports ), statistics.median( readies ) if readies else None
+
+def Main( runs ):
+    script = STARTUP.format( root=root, benchmarks=os.path.join( root, 'benchmarks' ) )
+
+    with tempfile.TemporaryDirectory() as cache:
+        env = dict( os.environ, XDG_CACHE_HOME=cache, APPDATA=cache )
+        preferences = os.path.join( cache, 'MarkerMan', 'preferences.json' )
+
+        # Cold: no cached screen size, so Tk has to start
+        cold = Measure( script, env, 1 )
+
+        # Warm: screen size read from the preferences file
+        os.makedirs( os.path.dirname( preferences ), exist_ok=True )
+        with open( preferences, 'w' ) as file:
+            json.dump( { 'screen': { 'width': 1920, 'height': 1080, 'scaling': 1.0, 'midX': 960, 'midY': 540, 'measured': time.time() } }, file )
+        warm = Measure( script, env, runs )
+
+    tk = subprocess.run( [ sys.executable, '-X', 'importtime', '-c', 'import tkinter' ], capture_output=True, text=True ).stderr
+    tkImport = sum( int( line.split( '|' )[1] ) for line in tk.splitlines()[1:] if '|' in line ) / 1e6
+
+    print( f"import MarkerMan: {warm[0] * 1000:.1f}ms (tkinter would add {tkImport * 1000:.1f}ms)" )
+    print( f"first dialog, cold: {cold[1] * 1000:.1f}ms" if cold[1] else "first dialog, cold: Tk unavailable (no display)" )
+    print( f"first dialog, warm: {warm[1] * 1000:.1f}ms" )
+
+if __name__ == '__main__':
+    Main( int( sys.argv[1] ) if len( sys.argv ) > 1 else 10 )
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+"""
+Times the main MarkerManager operations against the fake Resolve at a few marker set
+sizes, checks the batch clip marking still matches the marker by marker loops, and
+stores the results as JSON so runs can be compared.
+
+    python benchmarks/bench_suite.py [--sizes 100 10000 1000000] [--latency ms] [--runs n]
+                                     [--output results.json] [--baseline previous.json]
+"""
+
+import os, sys, io, time, json, platform, argparse, statistics, contextlib, tempfile
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+from MarkerMan import MarkerManager, log
+from fake_resolve import CreateResolve, SIZES
+
+COLORS = [ 'Blue', 'Green', 'Yellow', 'Pink' ]
+
+def Manager( count, latency, **options ):
+    # Without the snapshot cache, so nothing is read from previous runs
+    with contextlib.redirect_stdout( io.StringIO() ):
+        mm = MarkerManager( CreateResolve( count, latency, **options ), headless=True, cache=False )
+        log.Flush()
+        return mm
+
+def Marked( count, latency ):
+    mm = Manager( count, latency )
+    mm.MarkersByColor( COLORS )
+    mm.MarkClipsInBatch( 'MarkClipsUsingDualMarkers' )
+    return mm
+
+def Clips( mm ):
+    return [ ( clip['inPoint'], clip['outPoint'], clip['name'] ) for clip in mm.clips ]
+
+def Benchmarks( count, latency, directory ):
+    """
+    name: ( setup, run ), setup builds a fresh MarkerManager so each run starts cold.
+    """
+    def _markers( mm ):
+        mm.markers = mm.GetMarkers()
+        return mm
+
+    def _queue( mm ):
+        mm.renderLocation = directory
+        return mm
+
+    return {
+        'GetMarkersByColor'             : ( lambda: Manager( count, latency ), lambda mm: mm.GetMarkersByColor( COLORS[:2] ) ),
+        'MarkClipsUsingDualMarkers'     : ( lambda: _markers( Manager( count, latency ) ), lambda mm: mm.MarkClipsUsingDualMarkers() ),
+        'MarkClipsUsingMarkerDuration'  : ( lambda: _markers( Manager( count, latency ) ), lambda mm: mm.MarkClipsUsingMarkerDuration() ),
+        'MarkClipsInBatch(dual)'        : ( lambda: _markers( Manager( count, latency ) ), lambda mm: mm.MarkClipsInBatch( 'MarkClipsUsingDualMarkers' ) ),
+        'MarkClipsInBatch(duration)'    : ( lambda: _markers( Manager( count, latency ) ), lambda mm: mm.MarkClipsInBatch( 'MarkClipsUsingMarkerDuration' ) ),
+        'EditMarkers'                   : ( lambda: Manager( count, latency ), lambda mm: mm.EditMarkers( mm.GetMarkersByColor( 'Blue' ), color='Red' ) ),
+        'DeleteAllMarkers'              : ( lambda: Manager( count, latency ), lambda mm: mm.DeleteAllMarkers() ),
+        'AddClipsToRenderQueue'         : ( lambda: _queue( Marked( count, latency ) ), lambda mm: mm.AddClipsToRenderQueue( duplicates='allow' ) ),
+    }
+
+def Time( setup, run, runs ):
+    timings = []
+    for attempt in range( runs ):
+        state = setup()
+        with contextlib.redirect_stdout( io.StringIO() ):
+            started = time.perf_counter()
+            run( state )
+            timings.append( time.perf_counter() - started )
+            log.Flush()
+    return { 'median': statistics.median( timings ), 'min': min( timings ), 'runs': runs }
+
+def Check( count ):
+    # The batch engine has to give exactly the clips the reference loops give, on the
+    # regular benchmark markers and on random ones
+    for seed in ( None, count ):
+        for mode in ( 'MarkClipsUsingDualMarkers', 'MarkClipsUsingMarkerDuration' ):
+            loop = Manager( count, 0.0, seed=seed )
+            loop.markers = loop.GetMarkers()
+            getattr( loop, mode )()
+            batch = Manager( count, 0.0, seed=seed )
+            batch.markers = batch.GetMarkers()
+            batch.MarkClipsInBatch( mode )
+            if Clips( loop ) != Clips( batch ):
+                raise AssertionError( f"MarkClipsInBatch differs from {mode} at {count} markers (seed {seed})" )
+
+def Compare( results, baseline, threshold=1.2 ):
+    for size, timings in results.items():
+        for name, timing in timings.items():
+            previous = baseline.get( size, {} ).get( name )
+            if not previous:
+                continue
+            ratio = timing['median'] / previous['median'] if previous['median'] else 1.0
+            flag = '  SLOWER' if ratio > threshold else ''
+            print( f"{size:>8} {name:<30} {ratio:>6.2f}x{flag}" )
+
+def Main( argv=None ):
+    parser = argparse.ArgumentParser( description='Time MarkerManager operations against a fake Resolve.' )
+    parser.add_argument( '--sizes', nargs='+', type=int, default=list( SIZES ), help='Marker set sizes.' )
+    parser.add_argument( '--latency', type=float, default=0.0, help='Simulated bridge latency per API call, in ms.' )
+    parser.add_argument( '--runs', type=int, default=3, help='Runs per benchmark, the median is reported.' )
+    parser.add_argument( '--only', nargs='+', default=None, help='Only run these benchmarks.' )
+    parser.add_argument( '--output', default=None, help='Write the results to this JSON file.' )
+    parser.add_argument( '--baseline', default=None, help='Compare against the results in this JSON file.' )
+    args = parser.parse_args( argv )
+
+    latency = args.latency / 1000
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.sizes:
+            Check( min( count, 10000 ) )
+            # The biggest sets only get one run, they take long enough to be stable
+            runs = args.runs if count <= 10000 else 1
+            results[ str( count ) ] = {}
+            for name, ( setup, run ) in Benchmarks( count, latency, directory ).items():
+                if args.only and name not in args.only:
+                    continue
+                timing = results[ str( count ) ][ name ] = Time( setup, run, runs )
+                print( f"{count:>8} {name:<30} {timing['median'] * 1000:>10.1f}ms" )
+
+    if args.baseline:
+        with open( args.baseline, encoding='utf-8' ) as file:
+            Compare( results, json.load( file ).get( 'results', {} ) )
+
+    if args.output:
+        with open( args.output, 'w', encoding='utf-8' ) as file:
+            json.dump( {
+                'python'    : platform.python_version(),
+                'platform'  : platform.platform(),
+                'latency'   : args.latency,
+                'results'   : results,
+            }, file, indent=4 )
+
+if __name__ == '__main__':
+    Main()
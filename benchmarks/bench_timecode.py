@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""
+Converting frame values to timecode and back with Timecode, against the float divmod
+FramesToDuration used before.
+
+    python benchmarks/bench_timecode.py [frames]
+"""
+
+import os, sys, time, random
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+import MarkerMan
+from MarkerMan import Timecode
+
+def FramesToDuration( diff_frames, frameRate ):
+    diff_seconds, diff_frames = divmod( diff_frames, frameRate )
+    diff_minutes, diff_seconds = divmod( diff_seconds, 60 )
+    diff_hours, diff_minutes = divmod( diff_minutes, 60 )
+    return f'{int(diff_hours):02d}:{int(diff_minutes):02d}:{int(diff_seconds):02d}:{int(diff_frames):02d}'
+
+def Time( name, count, function ):
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    print( f"{name:>36}: {elapsed:.3f}s ({count / elapsed / 1e6:.2f}M/s)" )
+    return result
+
+def Main( count ):
+    frames = [ random.randrange( 0, 24 * 60 * 60 * 30 ) for _ in range( count ) ]
+
+    Time( 'divmod FramesToDuration, 29.97', count, lambda: [ FramesToDuration( frame, 29.97 ) for frame in frames ] )
+
+    for frameRate, dropFrame in ( ( 25, False ), ( 29.97, True ) ):
+        timecode = Timecode( frameRate, dropFrame )
+        label = f"{frameRate}{' DF' if dropFrame else ''}"
+        Time( f"ToTimecode per frame, {label}", count, lambda: [ timecode.ToTimecode( frame ) for frame in frames ] )
+
+        MarkerMan.numpy = False
+        Time( f"ToTimecodes, {label}", count, lambda: timecode.ToTimecodes( frames ) )
+
+        MarkerMan.numpy = None
+        if MarkerMan.GetNumPy():
+            timecodes = Time( f"ToTimecodes with NumPy, {label}", count, lambda: timecode.ToTimecodes( frames ) )
+        else:
+            timecodes = timecode.ToTimecodes( frames )
+
+        Time( f"ToFramesBatch, {label}", count, lambda: timecode.ToFramesBatch( timecodes ) )
+
+if __name__ == '__main__':
+    Main( int( sys.argv[1] ) if len( sys.argv ) > 1 else 1000000 )
@@ -0,0 +1,223 @@
+"""
+In-process stand-in for the parts of the Resolve scripting API MarkerMan uses, so it
+can be driven without Resolve running. Every call can be given a simulated scripting
+bridge latency.
+
+    resolve = CreateResolve( 10000, latency=0.001 )
+    MarkerMan.MarkerManager( resolve, headless=True )
+"""
+
+import time, random
+
+# Marker set sizes the benchmarks run at by default
+SIZES = ( 100, 10000, 1000000 )
+
+class FakeBridge:
+    latency = 0.0
+
+    def __getattribute__( self, name ):
+        # Public API methods pay the simulated bridge latency
+        latency = object.__getattribute__( self, 'latency' )
+        if latency and name[:1].isupper():
+            time.sleep( latency )
+        return object.__getattribute__( self, name )
+
+class FakeTimeline( FakeBridge ):
+    def __init__( self, markers=None, startFrame=86400, name='Timeline 1', latency=0.0, duration=None ):
+        self.markers = dict( markers or {} )
+        self.startFrame = startFrame
+        self.name = name
+        self.latency = latency
+        self.duration = duration
+
+    def GetName( self ):
+        return self.name
+
+    def GetUniqueId( self ):
+        return f"fake-{id( self )}"
+
+    def GetStartFrame( self ):
+        return self.startFrame
+
+    def GetEndFrame( self ):
+        if self.duration is not None:
+            return self.startFrame + self.duration
+        end = max( ( frame + marker['duration'] for frame, marker in self.markers.items() ), default=0 )
+        return self.startFrame + end + 1
+
+    def GetMarkers( self ):
+        return { frame: dict( marker ) for frame, marker in self.markers.items() }
+
+    def AddMarker( self, frame, color, name, note, duration, customData=None ):
+        if frame in self.markers:
+            return False
+        self.markers[ frame ] = { 'color': color, 'name': name, 'note': note, 'duration': duration, 'customData': customData or '' }
+        return True
+
+    def DeleteMarkerAtFrame( self, frame ):
+        return self.markers.pop( frame, None ) is not None
+
+    def DeleteMarkersByColor( self, color ):
+        frames = [ frame for frame, marker in self.markers.items() if color == 'All' or marker['color'] == color ]
+        for frame in frames:
+            del self.markers[ frame ]
+        return True
+
+    def UpdateMarkerCustomData( self, frame, customData ):
+        if frame not in self.markers:
+            return False
+        self.markers[ frame ]['customData'] = customData
+        return True
+
+class FakeProject( FakeBridge ):
+    """
+    Project with timelines and a render queue. Renders finish straight away unless
+    renderTime (seconds per job) is given.
+    """
+    def __init__( self, timelines=None, name='Project 1', latency=0.0, frameRate=24.0, renderTime=0.0 ):
+        self.timelines = list( timelines or [ FakeTimeline( latency=latency ) ] )
+        self.timeline = self.timelines[0]
+        self.name = name
+        self.latency = latency
+        self.renderTime = renderTime
+        self.settings = {
+            'timelineFrameRate'             : str( frameRate ),
+            'timelineDropFrameTimecode'     : '0',
+            'timelineResolutionHeight'      : '1080',
+            'timelineResolutionWidth'       : '1920',
+        }
+        self.renderSettings = {}
+        self.jobs = {}
+        self.jobCount = 0
+        self.rendering = []
+        self.renderStarted = 0.0
+
+    def GetName( self ):
+        return self.name
+
+    def GetSetting( self, name=None ):
+        return self.settings.get( name, '' ) if name else dict( self.settings )
+
+    def GetCurrentTimeline( self ):
+        return self.timeline
+
+    def SetCurrentTimeline( self, timeline ):
+        if timeline not in self.timelines:
+            return False
+        self.timeline = timeline
+        return True
+
+    def GetTimelineCount( self ):
+        return len( self.timelines )
+
+    def GetTimelineByIndex( self, index ):
+        return self.timelines[ index - 1 ] if 0 < index <= len( self.timelines ) else None
+
+    def LoadRenderPreset( self, name ):
+        return bool( name )
+
+    def SetRenderSettings( self, settings ):
+        self.renderSettings.update( settings )
+        return True
+
+    def AddRenderJob( self ):
+        self.jobCount = self.jobCount + 1
+        jobId = f"job-{self.jobCount}"
+        self.jobs[ jobId ] = {
+            'JobId'         : jobId,
+            'TimelineName'  : self.timeline.name,
+            'MarkIn'        : self.renderSettings.get( 'MarkIn', 0 ),
+            'MarkOut'       : self.renderSettings.get( 'MarkOut', 0 ),
+            'TargetDir'     : self.renderSettings.get( 'TargetDir', '' ),
+            'CustomName'    : self.renderSettings.get( 'CustomName', '' ),
+        }
+        return jobId
+
+    def GetRenderJobList( self ):
+        return [ dict( job ) for job in self.jobs.values() ]
+
+    def DeleteRenderJob( self, jobId ):
+        return self.jobs.pop( jobId, None ) is not None
+
+    def DeleteAllRenderJobs( self ):
+        self.jobs.clear()
+        return True
+
+    def StartRendering( self, jobIds=None, interactive=False ):
+        self.rendering = [ jobId for jobId in ( jobIds or list( self.jobs ) ) if jobId in self.jobs ]
+        self.renderStarted = time.perf_counter()
+        return True
+
+    def StopRendering( self ):
+        self.rendering = []
+
+    def IsRenderingInProgress( self ):
+        return self.Rendered() < len( self.rendering )
+
+    def Rendered( self ):
+        if not self.renderTime:
+            return len( self.rendering )
+        return int( ( time.perf_counter() - self.renderStarted ) / self.renderTime )
+
+    def GetRenderJobStatus( self, jobId ):
+        if jobId not in self.rendering:
+            return { 'JobStatus': 'Ready', 'CompletionPercentage': 0 }
+        position = self.rendering.index( jobId )
+        rendered = self.Rendered()
+        if position < rendered:
+            return { 'JobStatus': 'Complete', 'CompletionPercentage': 100, 'TimeTakenToRenderInMs': int( self.renderTime * 1000 ) }
+        if position == rendered:
+            elapsed = time.perf_counter() - self.renderStarted - rendered * self.renderTime
+            return { 'JobStatus': 'Rendering', 'CompletionPercentage': int( 100 * elapsed / self.renderTime ) }
+        return { 'JobStatus': 'Ready', 'CompletionPercentage': 0 }
+
+class FakeProjectManager( FakeBridge ):
+    def __init__( self, projects, latency=0.0 ):
+        self.projects = { project.name: project for project in projects }
+        self.project = projects[0]
+        self.latency = latency
+
+    def GetCurrentProject( self ):
+        return self.project
+
+    def LoadProject( self, name ):
+        project = self.projects.get( name )
+        if project:
+            self.project = project
+        return project
+
+class FakeResolve( FakeBridge ):
+    def __init__( self, projects=None, latency=0.0 ):
+        self.projectManager = FakeProjectManager( list( projects or [ FakeProject( latency=latency ) ] ), latency )
+        self.latency = latency
+
+    def GetProjectManager( self ):
+        return self.projectManager
+
+def CreateResolve( count=0, latency=0.0, timelines=1, **options ):
+    """
+    Resolve with one project holding timelines of count synthetic markers each.
+    options are passed on to GenerateMarkers.
+    """
+    markers = GenerateMarkers( count, **options )
+    project = FakeProject( [ FakeTimeline( markers, name=f"Timeline {index}", latency=latency ) for index in range( 1, timelines + 1 ) ], latency=latency )
+    return FakeResolve( [ project ], latency )
+
+def GenerateMarkers( count, colors=( 'Blue', 'Green', 'Yellow', 'Pink' ), spacing=250, seed=None ):
+    # Every other marker is named, so they pair up in dual marker mode. Given a seed,
+    # names, durations and gaps are random, giving runs of named or unnamed markers and
+    # zero durations too.
+    generator = random.Random( seed ) if seed is not None else None
+    markers = {}
+    frame = 0
+    for index in range( count ):
+        named = generator.random() < 0.6 if generator else index % 2 == 0
+        markers[ frame ] = {
+            'color'     : generator.choice( colors ) if generator else colors[ index % len( colors ) ],
+            'name'      : f"Scene {index}" if named else f"Marker {index}",
+            'note'      : '',
+            'duration'  : generator.choice( ( 0, 0, 1, spacing // 2, spacing * 2 ) ) if generator else spacing // 2,
+            'customData': '',
+        }
+        frame = frame + ( generator.randint( 1, spacing ) if generator else spacing )
+    return markers
@@ -0,0 +1,66 @@
+"""
+MarkClipsInBatch has to give exactly the clips MarkClipsUsingDualMarkers and
+MarkClipsUsingMarkerDuration give, with and without NumPy.
+
+    python -m unittest discover tests
+"""
+
+import os, sys, random, unittest
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+sys.path.insert( 0, ROOT )
+sys.path.insert( 0, os.path.join( ROOT, 'benchmarks' ) )
+
+import MarkerMan
+from fake_resolve import CreateResolve
+
+MODES = ( 'MarkClipsUsingDualMarkers', 'MarkClipsUsingMarkerDuration' )
+COLORS = [ 'Blue', 'Green', 'Yellow', 'Pink' ]
+
+class ClipMarkingTest( unittest.TestCase ):
+    def tearDown( self ):
+        MarkerMan.numpy = None
+
+    def Marked( self, resolve, colors, mode, batch ):
+        mm = MarkerMan.MarkerManager( resolve, headless=True, cache=False )
+        mm.MarkersByColor( colors )
+        if batch:
+            mm.MarkClipsInBatch( mode )
+        else:
+            getattr( mm, mode )()
+        return mm.clips.AsDicts()
+
+    def CheckRandom( self, sets=200 ):
+        generator = random.Random( 4 )
+        for seed in range( sets ):
+            resolve = CreateResolve( generator.randint( 0, 80 ), seed=seed )
+            colors = generator.sample( COLORS, generator.randint( 1, len( COLORS ) ) )
+            for mode in MODES:
+                with self.subTest( seed=seed, mode=mode ):
+                    self.assertEqual( self.Marked( resolve, colors, mode, True ), self.Marked( resolve, colors, mode, False ) )
+
+    def test_random_markers_python( self ):
+        MarkerMan.numpy = False
+        self.CheckRandom()
+
+    @unittest.skipUnless( MarkerMan.GetNumPy(), 'NumPy is not installed' )
+    def test_random_markers_numpy( self ):
+        self.CheckRandom()
+
+    def test_runs_of_named_markers( self ):
+        # Consecutive named markers pair up, an unnamed marker restarts the pairing
+        names = [ 'A', 'B', 'C', 'Marker 1', 'D', 'E', 'F', 'G', 'Marker 2', 'Marker 3', 'H' ]
+        resolve = CreateResolve()
+        resolve.GetProjectManager().GetCurrentProject().GetCurrentTimeline().markers = {
+            frame * 10: { 'color': 'Blue', 'name': name, 'note': '', 'duration': 0, 'customData': '' }
+            for frame, name in enumerate( names )
+        }
+        for numpy in ( False, None ):
+            MarkerMan.numpy = numpy
+            clips = self.Marked( resolve, [ 'Blue' ], 'MarkClipsUsingDualMarkers', True )
+            self.assertEqual( [ clip['name'] for clip in clips ], [ 'A', 'C', 'D', 'F' ] )
+            self.assertEqual( clips, self.Marked( resolve, [ 'Blue' ], 'MarkClipsUsingDualMarkers', False ) )
+            self.assertEqual( self.Marked( resolve, [ 'Blue' ], 'MarkClipsUsingMarkerDuration', True ), [] )
+
+if __name__ == '__main__':
+    unittest.main()
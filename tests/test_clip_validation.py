@@ -0,0 +1,76 @@
+"""
+ClipValidation's single sweep has to find the problems a clip by clip comparison finds.
+
+    python -m unittest discover tests
+"""
+
+import os, sys, random, unittest
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+sys.path.insert( 0, ROOT )
+
+from MarkerMan import ClipTable, ClipValidation
+
+def Table( clips ):
+    table = ClipTable( None )
+    for index, ( inPoint, outPoint ) in enumerate( clips, 1 ):
+        table.Add( inPoint, outPoint, { 'name': f"Clip {index}", 'note': '', 'color': 'Blue' }, index )
+    return table
+
+class ClipValidationTest( unittest.TestCase ):
+    def Validate( self, clips, startFrame=0, endFrame=1000 ):
+        return ClipValidation( [ clip[0] for clip in clips ], [ clip[1] for clip in clips ], startFrame, endFrame )
+
+    def test_categories( self ):
+        clips = [ ( 0, 10 ), ( 10, 20 ), ( 15, 25 ), ( 30, 30 ), ( 50, 40 ), ( 990, 1010 ), ( -5, 5 ) ]
+        validation = self.Validate( clips )
+        self.assertEqual( validation.inverted, [ 4 ] )
+        self.assertEqual( validation.empty, [ 3 ] )
+        self.assertEqual( sorted( validation.outOfRange ), [ 5, 6 ] )
+        # Touching clips don't overlap, out-points are exclusive
+        self.assertEqual( sorted( validation.overlaps ), [ ( 0, 6 ), ( 2, 1 ) ] )
+        self.assertEqual( len( validation ), 6 )
+        self.assertEqual( validation.Summary(), '2 overlapping, 1 ending before they start, 1 zero length, 2 outside the timeline' )
+
+    def test_clean( self ):
+        validation = self.Validate( [ ( 0, 10 ), ( 10, 20 ), ( 100, 200 ) ] )
+        self.assertEqual( len( validation ), 0 )
+        self.assertEqual( validation.Summary(), '' )
+
+    def test_overlap_names_clip_reaching_furthest( self ):
+        # The long first clip is what the later ones overlap, not their neighbour
+        validation = self.Validate( [ ( 0, 500 ), ( 10, 20 ), ( 30, 40 ) ] )
+        self.assertEqual( validation.overlaps, [ ( 1, 0 ), ( 2, 0 ) ] )
+
+    def test_matches_pairwise( self ):
+        generator = random.Random( 19 )
+        for seed in range( 300 ):
+            clips = []
+            for _ in range( generator.randint( 0, 60 ) ):
+                inPoint = generator.randint( -50, 1050 )
+                clips.append( ( inPoint, inPoint + generator.choice( ( -3, 0, 1, 10, generator.randint( 1, 200 ) ) ) ) )
+            with self.subTest( seed=seed ):
+                validation = self.Validate( clips )
+                valid = [ position for position, ( inPoint, outPoint ) in enumerate( clips ) if outPoint > inPoint ]
+                order = sorted( valid, key=lambda position: clips[ position ] )
+                self.assertEqual( sorted( validation.inverted ), [ position for position, clip in enumerate( clips ) if clip[1] < clip[0] ] )
+                self.assertEqual( sorted( validation.empty ), [ position for position, clip in enumerate( clips ) if clip[1] == clip[0] ] )
+                self.assertEqual( sorted( validation.outOfRange ), [ position for position in valid if clips[ position ][0] < 0 or clips[ position ][1] > 1000 ] )
+
+                overlapping = [ position for rank, position in enumerate( order ) if any( clips[ earlier ][1] > clips[ position ][0] for earlier in order[ :rank ] ) ]
+                self.assertEqual( sorted( position for position, earlier in validation.overlaps ), sorted( overlapping ) )
+                for position, earlier in validation.overlaps:
+                    self.assertLess( order.index( earlier ), order.index( position ) )
+                    self.assertGreater( clips[ earlier ][1], clips[ position ][0] )
+
+    def test_describe( self ):
+        clips = [ ( 10, 20 ), ( 15, 30 ), ( 40, 40 ) ]
+        table = Table( clips )
+        validation = ClipValidation( table.inPoints, table.outPoints, 0, 100 )
+        self.assertEqual( validation.Describe( table, str ), [
+            '#02 Clip 2 (15 - 30) overlaps #01 Clip 1 (10 - 20)',
+            '#03 Clip 3 (40 - 40) has no frames',
+        ] )
+
+if __name__ == '__main__':
+    unittest.main()
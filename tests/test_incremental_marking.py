@@ -0,0 +1,129 @@
+"""
+MarkClipsIncrementally has to end up with the clips a full re-mark gives, and report
+the clips added, removed and modified since the previous run.
+
+    python -m unittest discover tests
+"""
+
+import os, sys, random, tempfile, unittest
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+sys.path.insert( 0, ROOT )
+sys.path.insert( 0, os.path.join( ROOT, 'benchmarks' ) )
+
+import MarkerMan
+from fake_resolve import CreateResolve
+
+MODES = ( 'MarkClipsUsingDualMarkers', 'MarkClipsUsingMarkerDuration' )
+COLORS = [ 'Blue', 'Green', 'Yellow', 'Pink' ]
+FIELDS = ( 'inPoint', 'outPoint', 'name', 'note', 'color' )
+
+class IncrementalMarkingTest( unittest.TestCase ):
+    def setUp( self ):
+        self.cacheHome = tempfile.TemporaryDirectory()
+        self.environ = os.environ.get( 'XDG_CACHE_HOME' )
+        os.environ['XDG_CACHE_HOME'] = self.cacheHome.name
+
+    def tearDown( self ):
+        MarkerMan.numpy = None
+        if self.environ is None:
+            os.environ.pop( 'XDG_CACHE_HOME', None )
+        else:
+            os.environ['XDG_CACHE_HOME'] = self.environ
+        self.cacheHome.cleanup()
+
+    def Timeline( self, resolve ):
+        return resolve.GetProjectManager().GetCurrentProject().GetCurrentTimeline()
+
+    def Mutate( self, timeline, generator ):
+        for _ in range( generator.randint( 0, 3 ) ):
+            action = generator.random()
+            if action < 0.3 and timeline.markers:
+                del timeline.markers[ generator.choice( list( timeline.markers ) ) ]
+            elif action < 0.6:
+                timeline.markers[ generator.randint( 0, 9000 ) ] = {
+                    'color'     : generator.choice( COLORS ),
+                    'name'      : generator.choice( ( 'Marker 1', 'Scene' ) ),
+                    'note'      : '',
+                    'duration'  : generator.choice( ( 0, 3, 400 ) ),
+                    'customData': '',
+                }
+            elif timeline.markers:
+                frame = generator.choice( list( timeline.markers ) )
+                timeline.markers[ frame ] = dict( timeline.markers[ frame ], name=generator.choice( ( 'Marker 1', 'Other' ) ), duration=generator.choice( ( 0, 7 ) ) )
+
+    def Incremental( self, mm, mode ):
+        mm.markerIndex = False
+        mm.MarkersByColor( COLORS )
+        return mm.MarkClipsIncrementally( mode )
+
+    def Full( self, resolve, mode ):
+        mm = MarkerMan.MarkerManager( resolve, headless=True, cache=False )
+        mm.MarkersByColor( COLORS )
+        mm.MarkClipsInBatch( mode )
+        return mm.clips.AsDicts()
+
+    def CheckChanges( self, changes, old, new ):
+        old = { clip['inPoint']: tuple( clip[ field ] for field in FIELDS ) for clip in old }
+        new = { clip['inPoint']: tuple( clip[ field ] for field in FIELDS ) for clip in new }
+        self.assertEqual( { clip['inPoint'] for clip in changes.added }, new.keys() - old.keys() )
+        self.assertEqual( { clip['inPoint'] for clip in changes.removed }, old.keys() - new.keys() )
+        self.assertEqual( { clip['inPoint'] for clip in changes.modified }, { inPoint for inPoint in new.keys() & old.keys() if new[ inPoint ] != old[ inPoint ] } )
+
+    def CheckRandom( self, sets=100, rounds=5 ):
+        for seed in range( sets ):
+            generator = random.Random( seed )
+            resolve = CreateResolve( generator.randint( 0, 80 ), seed=seed )
+            timeline = self.Timeline( resolve )
+            mode = generator.choice( MODES )
+            mm = MarkerMan.MarkerManager( resolve, headless=True, cache=False )
+            changes = self.Incremental( mm, mode )
+            self.assertEqual( len( changes.added ), len( mm.clips ) )
+            for step in range( rounds ):
+                with self.subTest( seed=seed, step=step, mode=mode ):
+                    old = mm.clips.AsDicts()
+                    self.Mutate( timeline, generator )
+                    changes = self.Incremental( mm, mode )
+                    full = self.Full( resolve, mode )
+                    self.assertEqual( mm.clips.AsDicts(), full )
+                    self.CheckChanges( changes, old, full )
+
+    def test_matches_full_remark( self ):
+        self.CheckRandom()
+
+    @unittest.skipUnless( MarkerMan.GetNumPy(), 'NumPy is not installed' )
+    def test_matches_full_remark_without_numpy( self ):
+        MarkerMan.numpy = False
+        self.CheckRandom( sets=30 )
+
+    def test_batch_mark_keeps_snapshot( self ):
+        # Marking more clips into self.clips mustn't change what the next run compares against
+        resolve = CreateResolve( 40, seed=5 )
+        mode = 'MarkClipsUsingMarkerDuration'
+        mm = MarkerMan.MarkerManager( resolve, headless=True, cache=False )
+        self.Incremental( mm, mode )
+        marked = mm.clips.AsDicts()
+        mm.MarkClipsInBatch( mode )
+        self.assertEqual( len( mm.clips ), 2 * len( marked ) )
+
+        changes = self.Incremental( mm, mode )
+        self.assertEqual( len( changes ), 0 )
+        self.assertEqual( mm.clips.AsDicts(), marked )
+
+    def test_snapshot_saved_between_sessions( self ):
+        resolve = CreateResolve( 60, seed=6 )
+        mode = 'MarkClipsUsingDualMarkers'
+        self.Incremental( MarkerMan.MarkerManager( resolve, headless=True ), mode )
+        old = self.Full( resolve, mode )
+
+        self.Mutate( self.Timeline( resolve ), random.Random( 2 ) )
+        self.Timeline( resolve ).markers[ 1 ] = { 'color': 'Blue', 'name': 'Scene', 'note': '', 'duration': 3, 'customData': '' }
+        mm = MarkerMan.MarkerManager( resolve, headless=True )
+        changes = self.Incremental( mm, mode )
+        full = self.Full( resolve, mode )
+        self.assertEqual( mm.clips.AsDicts(), full )
+        self.assertLess( len( changes ), len( full ) )
+        self.CheckChanges( changes, old, full )
+
+if __name__ == '__main__':
+    unittest.main()
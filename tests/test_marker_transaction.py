@@ -0,0 +1,93 @@
+"""
+MarkerTransaction has to leave the timeline exactly as it found it when a call fails
+part way through, and after Rollback().
+
+    python -m unittest discover tests
+"""
+
+import os, sys, random, unittest
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+sys.path.insert( 0, ROOT )
+sys.path.insert( 0, os.path.join( ROOT, 'benchmarks' ) )
+
+import MarkerMan
+from MarkerMan import MarkerTransaction, MarkerTransactionError
+from fake_resolve import FakeResolve, FakeProject, FakeTimeline, GenerateMarkers
+
+COLORS = [ 'Blue', 'Green', 'Yellow', 'Pink' ]
+
+class FlakyTimeline( FakeTimeline ):
+    """ Refuses the first AddMarker call at one frame, as Resolve does when it can't add a marker. """
+    def __init__( self, markers, failFrame ):
+        super().__init__( markers )
+        self.failFrame = failFrame
+
+    def AddMarker( self, frame, *args ):
+        if frame == self.failFrame:
+            self.failFrame = None
+            return False
+        return super().AddMarker( frame, *args )
+
+def Marker( color, name='', customData='', duration=1 ):
+    return { 'color': color, 'name': name, 'note': '', 'duration': duration, 'customData': customData }
+
+class MarkerTransactionTest( unittest.TestCase ):
+    def Desired( self, markers, generator ):
+        """ Deletes, changes, updates the custom data of and adds a few markers. """
+        desired = { frame: dict( marker ) for frame, marker in markers.items() }
+        for frame in generator.sample( sorted( desired ), len( desired ) // 4 ):
+            del desired[ frame ]
+        for frame in generator.sample( sorted( desired ), len( desired ) // 4 ):
+            if generator.random() < 0.5:
+                desired[ frame ]['name'] = 'changed'
+            else:
+                desired[ frame ]['customData'] = 'updated'
+        for frame in generator.sample( range( 1, 5000 ), 10 ):
+            desired.setdefault( frame * 2 + 1, Marker( generator.choice( COLORS ), 'new' ) )
+        return desired
+
+    def test_failed_add_rolls_back( self ):
+        generator = random.Random( 8 )
+        for seed in range( 50 ):
+            markers = GenerateMarkers( generator.randint( 1, 60 ), COLORS, seed=seed )
+            desired = self.Desired( markers, generator )
+            adds = [ frame for action, frame, marker in MarkerTransaction( FakeTimeline( markers ) ).Plan( desired ) if action == 'add' ]
+            if not adds:
+                continue
+            timeline = FlakyTimeline( markers, generator.choice( adds ) )
+            with self.subTest( seed=seed ):
+                with self.assertRaises( MarkerTransactionError ):
+                    MarkerTransaction( timeline ).Apply( desired )
+                self.assertEqual( timeline.GetMarkers(), markers )
+
+    def test_failed_add_after_colour_delete( self ):
+        markers = { 0: Marker( 'Blue' ), 10: Marker( 'Blue' ), 20: Marker( 'Green', customData='a' ) }
+        desired = { 20: Marker( 'Green', customData='b' ), 30: Marker( 'Pink' ) }
+        timeline = FlakyTimeline( markers, 30 )
+        transaction = MarkerTransaction( timeline )
+        self.assertEqual( [ action for action, frame, marker in transaction.Plan( desired ) ], [ 'deleteColor', 'update', 'add' ] )
+        with self.assertRaises( MarkerTransactionError ):
+            transaction.Apply( desired )
+        self.assertEqual( timeline.GetMarkers(), markers )
+
+    def test_rollback_after_apply( self ):
+        markers = GenerateMarkers( 40, COLORS, seed=3 )
+        desired = self.Desired( markers, random.Random( 3 ) )
+        timeline = FakeTimeline( markers )
+        transaction = MarkerTransaction( timeline )
+        transaction.Apply( desired )
+        self.assertEqual( timeline.GetMarkers(), desired )
+        transaction.Rollback()
+        self.assertEqual( timeline.GetMarkers(), markers )
+
+    def test_set_markers_raises( self ):
+        markers = { 0: Marker( 'Blue' ) }
+        timeline = FlakyTimeline( markers, 5 )
+        mm = MarkerMan.MarkerManager( FakeResolve( [ FakeProject( [ timeline ] ) ] ), headless=True, cache=False )
+        with self.assertRaises( MarkerTransactionError ):
+            mm.SetMarkers( { 0: Marker( 'Blue', 'changed' ), 5: Marker( 'Green' ) } )
+        self.assertEqual( timeline.GetMarkers(), markers )
+
+if __name__ == '__main__':
+    unittest.main()
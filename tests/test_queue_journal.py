@@ -0,0 +1,97 @@
+"""
+A render queue run that crashes part way through has to resume from the QueueJournal
+without queueing a clip twice, and the journal has to go once every clip is queued.
+
+    python -m unittest discover tests
+"""
+
+import os, sys, io, contextlib, tempfile, unittest
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+sys.path.insert( 0, ROOT )
+sys.path.insert( 0, os.path.join( ROOT, 'benchmarks' ) )
+
+import MarkerMan
+from MarkerMan import QueueJournal
+from fake_resolve import CreateResolve
+
+COLORS = [ 'Blue', 'Green' ]
+
+class QueueJournalTest( unittest.TestCase ):
+    def setUp( self ):
+        self.cacheHome = tempfile.TemporaryDirectory()
+        self.renderLocation = tempfile.TemporaryDirectory()
+        self.environ = os.environ.get( 'XDG_CACHE_HOME' )
+        os.environ['XDG_CACHE_HOME'] = self.cacheHome.name
+
+    def tearDown( self ):
+        if self.environ is None:
+            os.environ.pop( 'XDG_CACHE_HOME', None )
+        else:
+            os.environ['XDG_CACHE_HOME'] = self.environ
+        self.cacheHome.cleanup()
+        self.renderLocation.cleanup()
+
+    def Run( self, mm, **options ):
+        with contextlib.redirect_stdout( io.StringIO() ):
+            mm.Run( COLORS, 'MarkClipsUsingDualMarkers', self.renderLocation.name, **options )
+        return mm
+
+    def Crash( self, project, call ):
+        # AddRenderJob raises on the given call, like a scripting bridge dropping out
+        addRenderJob = project.AddRenderJob
+        calls = []
+        def AddRenderJob():
+            calls.append( 1 )
+            if len( calls ) == call:
+                raise RuntimeError( 'bridge hiccup' )
+            return addRenderJob()
+        project.AddRenderJob = AddRenderJob
+
+    def test_resume_after_crash( self ):
+        resolve = CreateResolve( 600 )
+        project = resolve.GetProjectManager().GetCurrentProject()
+        clips = len( self.Run( MarkerMan.MarkerManager( CreateResolve( 600 ), headless=True ) ).clips )
+
+        self.Crash( project, 100 )
+        mm = MarkerMan.MarkerManager( resolve, headless=True )
+        with self.assertRaises( RuntimeError ):
+            self.Run( mm )
+        self.assertEqual( len( project.jobs ), 99 )
+        path = mm.GetQueueJournalPath()
+        records = QueueJournal( path ).Load()
+        self.assertEqual( len( records ), clips )
+        self.assertEqual( sum( record['status'] == 'queued' for record in records.values() ), 99 )
+
+        del project.AddRenderJob
+        self.Run( MarkerMan.MarkerManager( resolve, headless=True ), resume=True, duplicates='allow' )
+        names = [ job['CustomName'] for job in project.jobs.values() ]
+        self.assertEqual( len( names ), clips )
+        self.assertEqual( len( set( names ) ), clips )
+        self.assertFalse( os.path.exists( path ) )
+
+    def test_cut_short_line_is_skipped( self ):
+        path = os.path.join( self.cacheHome.name, 'journal.jsonl' )
+        clip = { 'inPoint': 10, 'outPoint': 20 }
+        journal = QueueJournal( path, batchSize=1 )
+        journal.Start( [ clip ], [ 'a.mov' ] )
+        journal.Record( clip, status='queued', jobId='1' )
+        with open( path, 'a', encoding='utf-8' ) as file:
+            file.write( '{"key": "10-20", "sta' )
+        self.assertEqual( journal.Load(), { '10-20': { 'key': '10-20', 'fileName': 'a.mov', 'status': 'queued', 'jobId': '1' } } )
+
+    def test_old_journals_evicted( self ):
+        directory = os.path.join( self.cacheHome.name, 'journals' )
+        os.makedirs( directory )
+        old = os.path.join( directory, 'old.jsonl' )
+        recent = os.path.join( directory, 'recent.jsonl' )
+        for path in ( old, recent ):
+            with open( path, 'w', encoding='utf-8' ) as file:
+                file.write( '{}\n' )
+        os.utime( old, ( 0, 0 ) )
+        QueueJournal( os.path.join( directory, 'current.jsonl' ) ).Start( [], [] )
+        self.assertFalse( os.path.exists( old ) )
+        self.assertTrue( os.path.exists( recent ) )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+ShardClips has to hand every clip to exactly one worker, keep each shard in timeline
+order and balance the frames between shards.
+
+    python -m unittest discover tests
+"""
+
+import os, sys, random, unittest
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+sys.path.insert( 0, ROOT )
+
+from MarkerMan import ShardClips
+
+def Clips( generator, count ):
+    clips = []
+    inPoint = 0
+    for index in range( count ):
+        frames = generator.choice( ( 1, 24, 240, generator.randint( 1, 5000 ) ) )
+        clips.append( { 'inPoint': inPoint, 'outPoint': inPoint + frames - 1, 'frames': frames, 'index': index } )
+        inPoint = inPoint + frames + generator.randint( 0, 100 )
+    return clips
+
+class ShardClipsTest( unittest.TestCase ):
+    def test_shards( self ):
+        generator = random.Random( 16 )
+        for seed in range( 200 ):
+            clips = Clips( generator, generator.randint( 0, 300 ) )
+            workers = generator.randint( 1, 12 )
+            with self.subTest( seed=seed, clips=len( clips ), workers=workers ):
+                shards = ShardClips( clips, workers )
+                self.assertEqual( len( shards ), workers )
+                self.assertEqual( sorted( clip['index'] for shard in shards for clip in shard ), list( range( len( clips ) ) ) )
+                for shard in shards:
+                    self.assertEqual( shard, sorted( shard, key=lambda clip: clip['inPoint'] ) )
+
+                # Longest first greedy packing never overshoots the mean by more than a clip
+                loads = [ sum( clip['frames'] for clip in shard ) for shard in shards ]
+                longest = max( ( clip['frames'] for clip in clips ), default=0 )
+                self.assertLessEqual( max( loads ), sum( loads ) / workers + longest )
+
+    def test_equal_clips_split_evenly( self ):
+        clips = [ { 'inPoint': index * 100, 'frames': 50 } for index in range( 12 ) ]
+        self.assertEqual( [ len( shard ) for shard in ShardClips( clips, 4 ) ], [ 3, 3, 3, 3 ] )
+
+    def test_longest_clip_alone( self ):
+        clips = [ { 'inPoint': 0, 'frames': 900 } ] + [ { 'inPoint': 1000 + index * 100, 'frames': 100 } for index in range( 9 ) ]
+        shards = ShardClips( clips, 2 )
+        self.assertEqual( sorted( sum( clip['frames'] for clip in shard ) for shard in shards ), [ 900, 900 ] )
+
+    def test_workers( self ):
+        clips = [ { 'inPoint': 0, 'frames': 10 }, { 'inPoint': 20, 'frames': 10 } ]
+        self.assertEqual( ShardClips( clips, 0 ), [ clips ] )
+        self.assertEqual( sorted( map( len, ShardClips( clips, 5 ) ) ), [ 0, 0, 0, 1, 1 ] )
+        self.assertEqual( ShardClips( [], 3 ), [ [], [], [] ] )
+
+if __name__ == '__main__':
+    unittest.main()
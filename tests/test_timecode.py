@@ -0,0 +1,77 @@
+"""
+Timecode, drop-frame numbering in particular.
+
+    python -m unittest discover tests
+"""
+
+import os, sys, unittest
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+sys.path.insert( 0, ROOT )
+
+import MarkerMan
+from MarkerMan import Timecode
+
+class TimecodeTest( unittest.TestCase ):
+    def tearDown( self ):
+        MarkerMan.numpy = None
+
+    def test_non_drop_frame( self ):
+        timecode = Timecode( 24 )
+        self.assertEqual( timecode.ToTimecode( 0 ), '00:00:00:00' )
+        self.assertEqual( timecode.ToTimecode( 86400 ), '01:00:00:00' )
+        self.assertEqual( timecode.ToTimecode( 86399 ), '00:59:59:23' )
+        self.assertEqual( timecode.ToFrames( '01:00:00:00' ), 86400 )
+
+    def test_drop_frame_minute_boundaries( self ):
+        timecode = Timecode( 29.97, dropFrame=True )
+        cases = {
+            1799    : '00:00:59;29',
+            # ;00 and ;01 are skipped at the start of every minute...
+            1800    : '00:01:00;02',
+            3597    : '00:01:59;29',
+            3598    : '00:02:00;02',
+            # ...except every tenth
+            17981   : '00:09:59;29',
+            17982   : '00:10:00;00',
+            19782   : '00:11:00;02',
+            107892  : '01:00:00;00',
+        }
+        for frames, expected in cases.items():
+            with self.subTest( frames=frames ):
+                self.assertEqual( timecode.ToTimecode( frames ), expected )
+                self.assertEqual( timecode.ToFrames( expected ), frames )
+
+    def test_drop_frame_59_94( self ):
+        timecode = Timecode( 59.94, dropFrame=True )
+        self.assertEqual( timecode.ToTimecode( 3599 ), '00:00:59;59' )
+        self.assertEqual( timecode.ToTimecode( 3600 ), '00:01:00;04' )
+        self.assertEqual( timecode.ToTimecode( 35964 ), '00:10:00;00' )
+
+    def test_drop_frame_only_for_fractional_rates( self ):
+        self.assertFalse( Timecode( 30, dropFrame=True ).dropFrame )
+        self.assertFalse( Timecode( 23.976, dropFrame=True ).dropFrame )
+        self.assertEqual( Timecode( 30, dropFrame=True ).ToTimecode( 1800 ), '00:01:00:00' )
+
+    def test_round_trips( self ):
+        for rate, dropFrame in ( ( 24, False ), ( 25, False ), ( 29.97, True ), ( 29.97, False ), ( 59.94, True ) ):
+            timecode = Timecode( rate, dropFrame )
+            frames = list( range( 0, 40000, 7 ) ) + list( range( 107800, 108000 ) )
+            with self.subTest( rate=rate, dropFrame=dropFrame ):
+                timecodes = [ timecode.ToTimecode( frame ) for frame in frames ]
+                self.assertEqual( [ timecode.ToFrames( text ) for text in timecodes ], frames )
+                self.assertEqual( timecode.ToFramesBatch( timecodes ), frames )
+                # Every frame gets its own timecode
+                self.assertEqual( len( set( timecodes ) ), len( frames ) )
+
+    def test_batch_matches_single( self ):
+        timecode = Timecode( 29.97, dropFrame=True )
+        frames = list( range( -5, 20000, 3 ) )
+        expected = [ timecode.ToTimecode( frame ) for frame in frames ]
+        for numpy in ( None, False ):
+            MarkerMan.numpy = numpy
+            with self.subTest( numpy=numpy is None ):
+                self.assertEqual( timecode.ToTimecodes( frames ), expected )
+
+if __name__ == '__main__':
+    unittest.main()